@@ -0,0 +1,345 @@
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RED_BASE = "192.168.60."
+PING_TIMEOUT_MS = 400
+SWEEP_WORKERS = 64
+SWEEP_REUSE_SECONDS = 5
+# Espera antes de volver a barrer por una MAC que no apareció: se duplica en cada fallo hasta el máximo
+SWEEP_BACKOFF_SECONDS = 10
+SWEEP_BACKOFF_MAX_SECONDS = 300
+PROC_NET_ARP = "/proc/net/arp"
+UDP_PROBE_PORT = 9
+UDP_SETTLE_SECONDS = 1.0
+
+_ATF_COM = 0x2
+_MAC_VACIA = "00:00:00:00:00:00"
+
+_IP_RE = re.compile(r"\d+\.\d+\.\d+\.\d+")
+# macOS imprime los octetos sin el cero inicial (0:1a:2b:...)
+_MAC_RE = re.compile(r"\b(?:[0-9a-fA-F]{1,2}[:-]){5}[0-9a-fA-F]{1,2}\b")
+
+
+def normalizar_mac(mac: str) -> str:
+    """Devuelve la MAC en minúsculas, con dos dígitos por octeto y separada por guiones (como `arp -a` en Windows)."""
+    return "-".join(octeto.zfill(2) for octeto in re.split(r"[:-]", str(mac).strip().lower()))
+
+
+# ---------------- COMANDOS DEL SISTEMA ----------------
+def ping_args(ip: str, timeout_ms: int = PING_TIMEOUT_MS, platform: str = sys.platform) -> list:
+    """Argumentos de un ping único con timeout: -w en ms (Windows), -W en ms (macOS/BSD) o en s (Linux)."""
+    if platform.startswith("win"):
+        return ["ping", "-n", "1", "-w", str(timeout_ms), ip]
+    if platform == "darwin" or "bsd" in platform:
+        return ["ping", "-c", "1", "-W", str(timeout_ms), ip]
+    return ["ping", "-c", "1", "-W", str(max(1, round(timeout_ms / 1000))), ip]
+
+
+def ping(ip: str, timeout_ms: int = PING_TIMEOUT_MS):
+    """Lanza un ping corto para que la IP entre en la tabla ARP."""
+    subprocess.call(ping_args(ip, timeout_ms), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def leer_tabla_arp() -> str:
+    encoding = "cp1252" if sys.platform.startswith("win") else "utf-8"
+    return subprocess.check_output(["arp", "-a"]).decode(encoding, errors="ignore")
+
+
+def leer_ip_neigh() -> str:
+    return subprocess.check_output(["ip", "neigh", "show"]).decode("utf-8", errors="ignore")
+
+
+def parsear_tabla_arp(salida: str) -> dict:
+    """Extrae los pares MAC→IP de la salida de `arp -a`."""
+    tabla = {}
+    for linea in salida.splitlines():
+        ip = _IP_RE.search(linea)
+        mac = _MAC_RE.search(linea)
+        if ip and mac:
+            tabla[normalizar_mac(mac.group(0))] = ip.group(0)
+    return tabla
+
+
+def parsear_proc_net_arp(contenido: str) -> dict:
+    """Extrae los pares MAC→IP de `/proc/net/arp`, ignorando entradas incompletas."""
+    tabla = {}
+    for linea in contenido.splitlines()[1:]:
+        campos = linea.split()
+        if len(campos) < 4:
+            continue
+        ip, _hw_type, flags, mac = campos[:4]
+        if int(flags, 16) & _ATF_COM == 0 or mac == _MAC_VACIA:
+            continue
+        tabla[normalizar_mac(mac)] = ip
+    return tabla
+
+
+def parsear_ip_neigh(salida: str) -> dict:
+    """Extrae los pares MAC→IP de `ip neigh show`."""
+    tabla = {}
+    for linea in salida.splitlines():
+        campos = linea.split()
+        if "lladdr" not in campos or campos[-1] in ("FAILED", "INCOMPLETE"):
+            continue
+        # Las entradas IPv6 comparten MAC con la IPv4 y la pisarían
+        if not _IP_RE.fullmatch(campos[0]):
+            continue
+        mac = campos[campos.index("lladdr") + 1]
+        tabla[normalizar_mac(mac)] = campos[0]
+    return tabla
+
+
+# ---------------- BACKENDS DE VECINOS ----------------
+class NeighborBackend:
+    """Interfaz común: `probe` hace que las IPs entren en la tabla de vecinos y `read_table` la lee."""
+
+    def probe(self, ips):
+        raise NotImplementedError
+
+    def read_table(self) -> dict:
+        raise NotImplementedError
+
+
+class PingArpBackend(NeighborBackend):
+    """Sondeo con ping en un pool acotado y lectura de `arp -a` (Windows y resto)."""
+
+    def __init__(self, ping=ping, leer_arp=leer_tabla_arp, max_workers=SWEEP_WORKERS):
+        self._ping = ping
+        self._leer_arp = leer_arp
+        self.max_workers = max_workers
+
+    def probe(self, ips):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Sweep") as pool:
+            # list() fuerza a esperar todos los pings y propaga errores inesperados
+            list(pool.map(self._ping, ips))
+
+    def read_table(self) -> dict:
+        return parsear_tabla_arp(self._leer_arp())
+
+
+class ProcNetArpBackend(NeighborBackend):
+    """Linux: lee `/proc/net/arp` (o `ip neigh`) sin lanzar un proceso por dirección.
+
+    Con `prime=True` el sondeo envía un datagrama UDP no bloqueante a cada host, lo
+    que obliga al kernel a resolver su ARP, y espera `settle_seconds` a las respuestas.
+    """
+
+    def __init__(
+        self,
+        arp_path=PROC_NET_ARP,
+        leer_neigh=leer_ip_neigh,
+        prime=True,
+        settle_seconds=UDP_SETTLE_SECONDS,
+    ):
+        self.arp_path = arp_path
+        self._leer_neigh = leer_neigh
+        self.prime = prime
+        self.settle_seconds = settle_seconds
+
+    def probe(self, ips):
+        if not self.prime:
+            return
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            for ip in ips:
+                try:
+                    sock.sendto(b"", (ip, UDP_PROBE_PORT))
+                except OSError:
+                    # EAGAIN o host inalcanzable: la petición ARP ya salió o no saldrá
+                    pass
+        time.sleep(self.settle_seconds)
+
+    def read_table(self) -> dict:
+        try:
+            with open(self.arp_path, "r", encoding="utf-8") as f:
+                return parsear_proc_net_arp(f.read())
+        except FileNotFoundError:
+            return parsear_ip_neigh(self._leer_neigh())
+
+
+def backend_por_plataforma() -> NeighborBackend:
+    if sys.platform.startswith("linux"):
+        return ProcNetArpBackend()
+    return PingArpBackend()
+
+
+# ---------------- BARRIDO DE SUBRED ----------------
+class SubnetSweeper:
+    """Barre la subred y comparte el resultado entre todos los que lo piden.
+
+    Si ya hay un barrido en curso, las llamadas concurrentes esperan a que termine
+    y reciben el mismo resultado en vez de lanzar otro. Una MAC que no aparece en
+    un barrido no vuelve a provocar otro hasta pasado su backoff, que crece con
+    cada fallo (una cámara apagada no barre la red cada pocos segundos).
+    """
+
+    def __init__(
+        self,
+        red_base=RED_BASE,
+        backend=None,
+        reuse_seconds=SWEEP_REUSE_SECONDS,
+        backoff_seconds=SWEEP_BACKOFF_SECONDS,
+        backoff_max_seconds=SWEEP_BACKOFF_MAX_SECONDS,
+    ):
+        self.red_base = red_base
+        self.backend = backend or backend_por_plataforma()
+        self.reuse_seconds = reuse_seconds
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        # mac -> (fallos seguidos, instante a partir del cual se puede volver a barrer)
+        self._misses = {}
+
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._running = False
+        self._last_result = {}
+        self._last_finished = 0.0
+
+    def _ips(self):
+        return [f"{self.red_base}{i}" for i in range(1, 255)]
+
+    def sweep(self) -> dict:
+        """Devuelve todas las correspondencias MAC→IP encontradas en la subred."""
+        with self._lock:
+            if self._running:
+                finished = self._last_finished
+                while self._running:
+                    self._done.wait()
+                if self._last_finished != finished:
+                    return dict(self._last_result)
+            elif time.time() - self._last_finished < self.reuse_seconds:
+                return dict(self._last_result)
+            self._running = True
+
+        result = {}
+        try:
+            self.backend.probe(self._ips())
+            result = self.backend.read_table()
+        finally:
+            with self._lock:
+                self._last_result = result
+                self._last_finished = time.time()
+                self._running = False
+                self._done.notify_all()
+        return dict(result)
+
+    def last_result(self) -> dict:
+        with self._lock:
+            return dict(self._last_result)
+
+    def find(self, mac: str):
+        mac = normalizar_mac(mac)
+        with self._lock:
+            misses, retry_at = self._misses.get(mac, (0, 0.0))
+            if time.time() < retry_at:
+                # En backoff: solo lo que haya visto el último barrido, sin lanzar procesos ni sondeos
+                return self._last_result.get(mac)
+
+        known = self.backend.read_table()
+        ip = known.get(mac) or self.sweep().get(mac)
+        with self._lock:
+            if ip:
+                self._misses.pop(mac, None)
+            else:
+                delay = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** misses)
+                self._misses[mac] = (misses + 1, time.time() + delay)
+        return ip
+
+
+# ---------------- CACHE MAC→IP ----------------
+class IpCache:
+    """Cache persistente MAC→IP en JSON.
+
+    Las entradas no caducan solas salvo que se indique `ttl_seconds`; lo normal es
+    invalidarlas cuando falla la conexión a la IP guardada.
+    """
+
+    def __init__(self, path, ttl_seconds=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            normalizar_mac(mac): entry
+            for mac, entry in data.items()
+            if isinstance(entry, dict) and entry.get("ip")
+        }
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, mac: str):
+        with self._lock:
+            entry = self._entries.get(normalizar_mac(mac))
+        if entry is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - entry.get("timestamp", 0) > self.ttl_seconds:
+            return None
+        return entry["ip"]
+
+    def store(self, mac: str, ip: str):
+        self.store_many({mac: ip})
+
+    def store_many(self, mapping: dict):
+        """Guarda las correspondencias; solo reescribe el fichero si alguna cambió.
+
+        Con TTL, una entrada igual también se reescribe cuando ya ha consumido la
+        mitad de su vida, para que no caduque tras reiniciar la aplicación.
+        """
+        if not mapping:
+            return
+        now = time.time()
+        changed = False
+        with self._lock:
+            for mac, ip in mapping.items():
+                mac = normalizar_mac(mac)
+                entry = self._entries.get(mac)
+                if entry is None or entry["ip"] != ip or (
+                    self.ttl_seconds is not None and now - entry.get("timestamp", 0) > self.ttl_seconds / 2
+                ):
+                    changed = True
+                self._entries[mac] = {"ip": ip, "timestamp": now}
+            if changed:
+                self._save()
+
+    def invalidate(self, mac: str):
+        with self._lock:
+            if self._entries.pop(normalizar_mac(mac), None) is not None:
+                self._save()
+
+
+_shared_sweeper = SubnetSweeper()
+
+
+def buscar_ip(mac: str, sweeper=None, cache=None):
+    """Resuelve la IP de una MAC usando el barrido compartido.
+
+    Si se pasa una cache, se guardan en ella todas las MAC vistas en el barrido.
+    """
+    sweeper = sweeper or _shared_sweeper
+    ip = sweeper.find(mac)
+    if cache is not None:
+        found = sweeper.last_result()
+        if ip:
+            found[normalizar_mac(mac)] = ip
+        cache.store_many(found)
+    return ip
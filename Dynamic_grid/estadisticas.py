@@ -0,0 +1,7 @@
+# Peso de la última medida en las medias móviles de tiempos que muestran las estadísticas
+STATS_SMOOTHING = 0.1
+
+
+def smooth(previous, value, smoothing=STATS_SMOOTHING):
+    """Media móvil exponencial; sin valor previo (None) se toma la medida tal cual."""
+    return value if previous is None else previous + smoothing * (value - previous)
@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+SNAPSHOT_WORKERS = 4
+DEFAULT_FORMAT = "jpg"
+PNG_COMPRESSION = 3
+# Espera máxima por el frame nuevo de cada cámara en una captura conjunta
+CAPTURE_ALL_TIMEOUT = 0.5
+MOSAIC_TILE_SIZE = (640, 360)
+SNAPSHOT_FORMATS = ("jpg", "webp", "png")
+
+
+def _encode_params(fmt, quality):
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if fmt == "png":
+        # La calidad no aplica a PNG (sin pérdidas); compresión baja para no penalizar la CPU
+        return [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION]
+    return [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+
+def encode_snapshot(frame, fmt=DEFAULT_FORMAT, quality=90, max_width=0):
+    """Codifica un frame para guardarlo como foto.
+
+    Devuelve (extensión, bytes, (ancho, alto)); con `max_width` > 0 se reduce
+    antes de codificar, que es lo que más abarata el JPEG de un frame 2K/4K.
+    """
+    fmt = fmt if fmt in SNAPSHOT_FORMATS else DEFAULT_FORMAT
+    h, w = frame.shape[:2]
+    if 0 < max_width < w:
+        frame = cv2.resize(frame, (max_width, max(1, h * max_width // w)), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(f".{fmt}", frame, _encode_params(fmt, max(1, min(100, int(quality)))))
+    if not ok:
+        raise ValueError(f"No se pudo codificar la foto como {fmt}")
+    return fmt, encoded.tobytes(), (frame.shape[1], frame.shape[0])
+
+
+# Codificación y escritura de fotos fuera del hilo de Qt, compartido por todas las cámaras
+snapshot_pool = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS, thread_name_prefix="Snapshot")
+
+
+# ---------------- CAPTURA CONJUNTA ----------------
+class CaptureAllResult(NamedTuple):
+    timestamp: float
+    # mac -> ruta de la foto guardada
+    paths: dict
+    # mac -> motivo por el que no hay foto
+    errors: dict
+    # mac -> ms entre la captura de su frame y la del frame más antiguo del lote
+    skew_ms: dict
+    mosaic_path: object
+
+
+def build_mosaic(frames, tile_size=MOSAIC_TILE_SIZE):
+    """Une los frames en una cuadrícula casi cuadrada; cada uno escalado a su celda con su etiqueta.
+
+    `frames` es una lista de (etiqueta, imagen BGR).
+    """
+    tile_w, tile_h = tile_size
+    cols = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / cols)
+    mosaic = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+    for i, (label, image) in enumerate(frames):
+        h, w = image.shape[:2]
+        scale = min(tile_w / w, tile_h / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        tile = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        top = (i // cols) * tile_h + (tile_h - size[1]) // 2
+        left = (i % cols) * tile_w + (tile_w - size[0]) // 2
+        mosaic[top:top + size[1], left:left + size[0]] = tile
+        cv2.putText(
+            mosaic, label, ((i % cols) * tile_w + 8, (i // cols) * tile_h + 24),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2, cv2.LINE_AA,
+        )
+    return mosaic
+
+
+def _encode_mosaic(frames, settings):
+    return encode_snapshot(
+        build_mosaic(frames),
+        settings.get("snapshot_format", DEFAULT_FORMAT),
+        settings.get("snapshot_quality", 90),
+    )
+
+
+def capture_all(feeds, on_done, mosaic=False):
+    """Foto de todas las cámaras bajo una misma marca de tiempo, sin bloquear a quien llama.
+
+    Se pide un frame nuevo a todas a la vez, se codifican en paralelo en el pool
+    de fotos y se escriben juntas al final. `on_done(CaptureAllResult)` se llama
+    desde un hilo de trabajo.
+    """
+    feeds = list(feeds)
+
+    def run():
+        timestamp = time.time()
+        previous = {feed.mac: feed.frame_slot.latest() for feed in feeds}
+        for feed in feeds:
+            feed.request_frame()
+
+        # Todas decodifican en paralelo: la espera total es la de la cámara más lenta
+        frames = {}
+        errors = {}
+        deadline = time.monotonic() + CAPTURE_ALL_TIMEOUT
+        for feed in feeds:
+            old = previous[feed.mac]
+            latest = feed.frame_slot.wait_newer(
+                old.seq if old is not None else 0, max(0.0, deadline - time.monotonic())
+            )
+            if latest is None:
+                errors[feed.mac] = "Sin imagen disponible"
+            else:
+                frames[feed.mac] = latest
+
+        encoding = {
+            feed.mac: snapshot_pool.submit(feed.snapshot_bytes, frames[feed.mac])
+            for feed in feeds
+            if feed.mac in frames
+        }
+        mosaic_future = None
+        if mosaic and frames:
+            labelled = [(feed.tag or feed.mac, frames[feed.mac].image) for feed in feeds if feed.mac in frames]
+            mosaic_future = snapshot_pool.submit(_encode_mosaic, labelled, feeds[0].settings)
+
+        paths = {}
+        for feed in feeds:
+            if feed.mac not in encoding:
+                continue
+            try:
+                paths[feed.mac] = feed.write_snapshot(
+                    frames[feed.mac], encoding[feed.mac].result(), "capture_all", timestamp=timestamp
+                )
+            except (OSError, ValueError) as exc:
+                errors[feed.mac] = str(exc)
+
+        mosaic_path = None
+        if mosaic_future is not None and paths:
+            try:
+                extension, data, _size = mosaic_future.result()
+                stamp = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S")
+                mosaic_path = next(iter(paths.values())).parent / f"mosaico_{stamp}.{extension}"
+                mosaic_path.write_bytes(data)
+            except (OSError, ValueError) as exc:
+                errors["mosaico"] = str(exc)
+
+        earliest = min((latest.timestamp for latest in frames.values()), default=timestamp)
+        skew_ms = {mac: (latest.timestamp - earliest) * 1000 for mac, latest in frames.items()}
+        on_done(CaptureAllResult(timestamp, paths, errors, skew_ms, mosaic_path))
+
+    threading.Thread(target=run, daemon=True, name="CaptureAll").start()
+
@@ -1,27 +1,88 @@
 import cv2
 import json
-import re
-import subprocess
 import threading
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 from urllib.parse import quote, unquote
 
 from PyQt6.QtCore import QTimer, Qt, pyqtSignal
-from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtWidgets import QGridLayout, QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidget
 
+from descubrimiento import IpCache, buscar_ip
+from fotos import encode_snapshot, snapshot_pool
+from grabacion import (
+    AsyncVideoWriter,
+    PreEventBuffer,
+    RetentionPolicy,
+    SegmentedRecorder,
+    StreamCopyRecorder,
+    ffmpeg_available,
+)
+from indice import MediaIndex
+from movimiento import MotionDetector, MotionMonitor
+from procesos import CaptureProcess
+from ptz import PtzSession
+from renderizado import LabelRenderer, refresh_scheduler
+
 try:
     from pytapo import Tapo
 except ModuleNotFoundError:
     Tapo = None
 
-RED_BASE = "192.168.60."
 RECORD_FPS = 15
-PING_TIMEOUT_MS = 400
+MAIN_STREAM = "stream1"
+SUB_STREAM = "stream2"
+PHOTO_FRAME_TIMEOUT = 0.5
 CONNECTION_CHECK_INTERVAL_MS = 60_000
+# Conexiones fallidas seguidas a la IP actual antes de darla por obsoleta y volver a buscar la cámara
+IP_STALE_AFTER_FAILURES = 3
 SETTINGS_FILE = "settings.json"
+IP_CACHE_FILE = "ip_cache.json"
+MEDIA_INDEX_FILE = "media_index.db"
+
+DEFAULT_SETTINGS = {
+    "tapo_user": "",
+    "tapo_password": "",
+    "media_directory": "",
+    # "thread" decodifica en el proceso de la GUI; "process" en un proceso por cámara
+    "capture_backend": "thread",
+    # "copy" remultiplexa el stream con ffmpeg sin recodificar; "encode" usa cv2.VideoWriter
+    "record_mode": "copy",
+    "record_container": "mp4",
+    # Cola del escritor en modo "encode": tamaño y política al llenarse ("drop_oldest" o "block")
+    "record_queue_size": 60,
+    "record_queue_policy": "drop_oldest",
+    # Grabación continua en segmentos (requiere ffmpeg); 0 desactiva cada límite de retención
+    "continuous_recording": False,
+    "segment_seconds": 300,
+    "retention_days": 0.0,
+    "retention_max_gb": 0.0,
+    # Segundos previos a "Grabar" que se guardan en memoria (JPEG del substream) y su tope por cámara;
+    # 0 lo desactiva. Obliga a decodificar el substream a RECORD_FPS aunque la vista esté en pausa.
+    # En modo "copy" ffmpeg no puede anteponerlos: se guardan aparte como <vídeo>_previo.mp4
+    "preroll_seconds": 0.0,
+    "preroll_max_mb": 32.0,
+    # Detección de movimiento: umbral por píxel (0-255), fracción mínima de imagen y post-roll
+    "motion_detection": False,
+    "motion_threshold": 25,
+    "motion_min_area": 0.01,
+    "motion_post_roll": 10.0,
+    # Fotos: formato ("jpg", "webp" o "png"), calidad 1-100, ancho máximo (0 = original) y ráfaga
+    "snapshot_format": "jpg",
+    "snapshot_quality": 90,
+    "snapshot_max_width": 0,
+    "burst_count": 5,
+    "burst_interval_ms": 200,
+    # "Capturar todas" guarda además un mosaico con todas las cámaras
+    "capture_all_mosaic": False,
+    # Intervalo mínimo entre movimientos al mantener pulsado un botón PTZ (se alarga si la cámara tarda más)
+    "ptz_repeat_ms": 150,
+}
+
+_ip_cache = IpCache(Path(__file__).with_name(IP_CACHE_FILE))
+media_index = MediaIndex(Path(__file__).with_name(MEDIA_INDEX_FILE))
 
 
 def _decode_if_needed(value: str) -> str:
@@ -34,31 +95,71 @@ def _decode_if_needed(value: str) -> str:
 
 # ---------------- BUSCAR IP ----------------
 def buscar_ip_por_mac(mac: str):
-    """Búsqueda de IP por MAC usando ping corto + ARP."""
-    mac = mac.lower().replace(":", "-")
-    for i in range(1, 255):
-        ip = f"{RED_BASE}{i}"
-        subprocess.call(
-            f"ping -n 1 -w {PING_TIMEOUT_MS} {ip}",
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            shell=True,
-        )
-        salida = subprocess.check_output("arp -a", shell=True).decode("cp1252", errors="ignore")
-        for linea in salida.splitlines():
-            if mac in linea.lower():
-                encontrada = re.findall(r"\d+\.\d+\.\d+\.\d+", linea)
-                if encontrada:
-                    return encontrada[0]
-    return None
+    """Búsqueda de IP por MAC; todas las cámaras comparten un único barrido de la subred."""
+    return buscar_ip(mac, cache=_ip_cache)
+
+
+# ---------------- FRAME SLOT ----------------
+class PublishedFrame(NamedTuple):
+    image: object
+    seq: int
+    timestamp: float
+
+
+class FrameSlot:
+    """Último frame publicado por el hilo de captura.
+
+    Los frames publicados son de solo lectura, así que los consumidores se quedan
+    con la referencia sin copiarla; el lock solo protege el cambio de puntero.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._current = None
+        self._seq = 0
+
+    def publish(self, image, timestamp=None):
+        image.flags.writeable = False
+        with self._lock:
+            self._seq += 1
+            self._current = PublishedFrame(image, self._seq, timestamp or time.time())
+            self._published.notify_all()
+
+    def latest(self):
+        with self._lock:
+            return self._current
+
+    def wait_newer(self, seq, timeout):
+        """Espera hasta `timeout` segundos un frame posterior a `seq` y devuelve el último disponible."""
+        with self._lock:
+            self._published.wait_for(lambda: self._seq > seq, timeout)
+            return self._current
+
+
+# ---------------- ÍNDICE DE MEDIA ----------------
+def _finish_indexed_file(path, ended_at):
+    """Anota en el índice fin, tamaño y resolución de un vídeo ya cerrado (o lo quita si no existe)."""
+    try:
+        size_bytes = path.stat().st_size
+    except FileNotFoundError:
+        media_index.remove([path])
+        return
+    cap = cv2.VideoCapture(str(path))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None
+    cap.release()
+    media_index.finish(path, ended_at, width=width, height=height, size_bytes=size_bytes)
 
 
 # ---------------- CAMERA THREAD ----------------
 class CameraFeed(threading.Thread):
-    def __init__(self, mac, usuario, password, tag="", settings=None):
+    def __init__(self, mac, usuario, password, tag="", settings=None, source=None):
         super().__init__(daemon=True, name=f"CameraStream-{mac}")
         self.mac = mac
         self.tag = tag
+        # Fichero local o RTSP de pruebas que sustituye a la cámara (sin resolver IP)
+        self.source = source
 
         # Guardamos versiones sin codificar para persistencia
         self.usuario_raw = _decode_if_needed(usuario)
@@ -67,14 +168,27 @@ class CameraFeed(threading.Thread):
         self.usuario = quote(self.usuario_raw, safe="")
         self.password = quote(self.password_raw, safe="")
         self.ip = None
+        self._ip_from_cache = False
+        self._connect_failures = 0
         self.rtsp_url = None
-        self.frame = None
+        self.frame_slot = FrameSlot()
+
+        # La cuadrícula usa el substream; el principal solo mientras alguien lo necesita
+        self.stream = SUB_STREAM
+        self._capture_stream = None
+        self._stream_lock = threading.Lock()
+        self._main_stream_users = set()
 
-        self.capture_lock = threading.Lock()
         self.writer_lock = threading.Lock()
 
         self.recording = False
         self.out = None
+        self.recorder = None
+        self.continuous_recorder = None
+        self.record_path = None
+        self.record_trigger = None
+        self.record_started_at = None
+        self._pending_preroll = []
         self.last_write = 0
         self.write_interval = 1 / RECORD_FPS
 
@@ -83,6 +197,26 @@ class CameraFeed(threading.Thread):
         self._last_ok_read = 0
         self.connected = False
         self.settings = settings or {}
+        self.preroll = PreEventBuffer(0, 0, RECORD_FPS)
+        self._configure_preroll()
+        self.motion_monitor = None
+
+        # Cliente PTZ persistente: se autentica una vez y se reutiliza en cada comando
+        self.ptz = PtzSession(self.get_tapo_client, name=f"PTZ-{mac}")
+
+        # Con capture_backend="process" la decodificación vive en un proceso aparte
+        self._capture_process = None
+
+        # Solo se decodifica (retrieve) cuando algún consumidor pide un frame
+        self._frame_demand = threading.Event()
+        self.decoded_frames = 0
+        self.skipped_decodes = 0
+        self.retrieve_ms = 0.0
+
+    @property
+    def frame(self):
+        latest = self.frame_slot.latest()
+        return latest.image if latest is not None else None
 
     def _get_media_output_dir(self):
         configured_dir = str(self.settings.get("media_directory", "")).strip()
@@ -90,22 +224,41 @@ class CameraFeed(threading.Thread):
         output_dir.mkdir(parents=True, exist_ok=True)
         return output_dir
 
-    def _build_media_filename(self, prefix, extension):
+    def _build_media_filename(self, prefix, extension, timestamp=None, suffix=""):
         camera_id = (self.ip or self.mac or "camara").replace(":", "-")
-        captured_at = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"{prefix}_{camera_id}_{captured_at}.{extension}"
+        captured_at = datetime.fromtimestamp(timestamp or time.time()).strftime("%Y%m%d_%H%M%S")
+        return f"{prefix}_{camera_id}_{captured_at}{suffix}.{extension}"
 
     def run(self):
-        self._connect_and_capture_loop()
+        self._sync_motion_detection()
+        try:
+            self._connect_and_capture_loop()
+        finally:
+            if self._capture_process is not None:
+                self._capture_process.stop()
+                self._capture_process = None
 
     def stop(self):
         self._stop_event.set()
         self._force_reconnect_event.set()
+        self._sync_motion_detection()
+        self.ptz.close()
         with self.writer_lock:
             if self.out is not None:
-                self.out.release()
+                self.out.close()
+                self._finish_media_entry(self.out.join)
                 self.out = None
                 self.recording = False
+            if self.recorder is not None:
+                # Igual que en stop_recording: ffmpeg se cierra en un hilo aparte
+                self._finish_media_entry(self.recorder.stop)
+                self.recorder = None
+                self.recording = False
+            if self.recording:
+                self._finish_media_entry()
+                self.recording = False
+        # Con _stop_event activo la para en un hilo aparte, sin esperar a ffmpeg
+        self._sync_continuous_recording()
 
     def request_reconnect(self):
         self._force_reconnect_event.set()
@@ -119,15 +272,63 @@ class CameraFeed(threading.Thread):
         if not self.connected or stale:
             self.request_reconnect()
 
-    def _build_rtsp_url(self):
+    def _stream_url(self, stream):
+        if self.source:
+            return self.source
         if self.ip:
-            self.rtsp_url = f"rtsp://{self.usuario}:{self.password}@{self.ip}:554/stream1"
+            return f"rtsp://{self.usuario}:{self.password}@{self.ip}:554/{stream}"
+        return None
+
+    def _build_rtsp_url(self):
+        url = self._stream_url(self.stream)
+        if url:
+            self.rtsp_url = url
+
+    def acquire_main_stream(self, reason):
+        """Pide el stream principal (vista grande, grabación...) mientras `reason` esté activo."""
+        with self._stream_lock:
+            self._main_stream_users.add(reason)
+            self._update_stream()
+
+    def release_main_stream(self, reason):
+        with self._stream_lock:
+            self._main_stream_users.discard(reason)
+            self._update_stream()
+
+    def _update_stream(self):
+        wanted = MAIN_STREAM if self._main_stream_users else SUB_STREAM
+        if wanted == self.stream:
+            return
+        self.stream = wanted
+        self._build_rtsp_url()
+        self.request_reconnect()
 
     def _resolve_ip_if_needed(self):
-        if self.ip is None:
-            self.ip = buscar_ip_por_mac(self.mac)
+        if self.source:
+            self._build_rtsp_url()
+        elif self.ip is None:
+            self.ip = _ip_cache.get(self.mac)
+            self._ip_from_cache = self.ip is not None
+            if self.ip is None:
+                self.ip = buscar_ip_por_mac(self.mac)
             self._build_rtsp_url()
 
+    def _on_connect_failed(self):
+        """Da la IP por obsoleta (nuevo lease DHCP) y la olvida para volver a buscar la cámara.
+
+        Una IP recién sacada de la cache se descarta al primer fallo; la que ya
+        funcionó en esta sesión, tras IP_STALE_AFTER_FAILURES fallos seguidos.
+        """
+        if self.source or self.ip is None:
+            return
+        self._connect_failures += 1
+        if self._ip_from_cache or self._connect_failures >= IP_STALE_AFTER_FAILURES:
+            _ip_cache.invalidate(self.mac)
+            self._ip_from_cache = False
+            self._connect_failures = 0
+            self.ip = None
+            self.rtsp_url = None
+
     def _connect_and_capture_loop(self):
         while not self._stop_event.is_set():
             self._resolve_ip_if_needed()
@@ -136,16 +337,24 @@ class CameraFeed(threading.Thread):
                 time.sleep(3)
                 continue
 
-            cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            # Reconexión o cambio de stream: lo que hubiera en el pre-evento ya no es continuo con lo que viene
+            self.preroll.clear()
+            self._capture_stream = self.stream
+            cap = self._open_capture(self.rtsp_url)
 
             if not cap.isOpened():
                 self.connected = False
                 cap.release()
+                self._on_connect_failed()
                 time.sleep(2)
                 continue
 
+            if self._ip_from_cache:
+                _ip_cache.store(self.mac, self.ip)
+                self._ip_from_cache = False
+            self._connect_failures = 0
             self.connected = True
+            self._sync_continuous_recording()
             self._last_ok_read = time.time()
             self._force_reconnect_event.clear()
 
@@ -154,74 +363,408 @@ class CameraFeed(threading.Thread):
                     self.connected = False
                     break
 
-                ret, frame = cap.read()
-                if not ret or frame is None or frame.size == 0:
+                # grab() vacía el buffer del stream siempre; retrieve() solo si hace falta el frame
+                if not cap.grab():
                     self.connected = False
                     time.sleep(0.4)
                     break
 
-                with self.capture_lock:
-                    self.frame = frame
-
-                self._last_ok_read = time.time()
+                grabbed_at = time.time()
+                self._last_ok_read = grabbed_at
                 self.connected = True
+                self._check_recorder()
+                if not self._needs_decode(grabbed_at):
+                    self.skipped_decodes += 1
+                    continue
+
+                ret, frame = cap.retrieve()
+                if not ret or frame is None or frame.size == 0:
+                    self.connected = False
+                    time.sleep(0.4)
+                    break
+
+                self.frame_slot.publish(frame, grabbed_at)
+                self.decoded_frames += 1
+                self.retrieve_ms = (time.time() - grabbed_at) * 1000
+                if self._preroll_due(grabbed_at):
+                    self.preroll.push(frame, grabbed_at)
                 self._write_if_recording(frame)
 
             cap.release()
             self._force_reconnect_event.clear()
             time.sleep(1)
 
+    def _open_capture(self, url):
+        if self.settings.get("capture_backend") == "process":
+            if self._capture_process is not None and not self._capture_process.is_alive():
+                # El proceso murió (p. ej. FFmpeg se cayó dentro de él): se sustituye por uno nuevo
+                self._capture_process.stop()
+                self._capture_process = None
+            if self._capture_process is None:
+                self._capture_process = CaptureProcess(f"CameraProcess-{self.mac}")
+            return self._capture_process.open(url)
+
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def request_frame(self):
+        """Marca que algún consumidor (vista, grabación, foto) necesita el próximo frame decodificado."""
+        self._frame_demand.set()
+
+    def _needs_decode(self, now):
+        if self._frame_demand.is_set():
+            self._frame_demand.clear()
+            return True
+        if self._preroll_due(now):
+            return True
+        return self.recording and self.recorder is None and now - self.last_write >= self.write_interval
+
+    def capture_stats(self):
+        latest = self.frame_slot.latest()
+        return {
+            "decoded_frames": self.decoded_frames,
+            "skipped_decodes": self.skipped_decodes,
+            "retrieve_ms": self.retrieve_ms,
+            "frame_age_ms": (time.time() - latest.timestamp) * 1000 if latest is not None else None,
+        }
+
     def _write_if_recording(self, frame):
         with self.writer_lock:
-            if self.recording and self.out:
-                now = time.time()
-                if now - self.last_write >= self.write_interval:
-                    self.out.write(frame)
-                    self.last_write = now
+            if not self.recording or self.recorder is not None:
+                return
+            if self.out is None and not self._open_writer(frame):
+                return
+            if self.out.failed:
+                self.out.close()
+                self._finish_media_entry(self.out.join)
+                self.out = None
+                self.recording = False
+                self.release_main_stream("record")
+                return
+            now = time.time()
+            if now - self.last_write < self.write_interval:
+                return
+            out = self.out
+            self.last_write = now
+        # Fuera del lock: con la política "block" puede esperar, y "Detener" no debe esperar con ella
+        out.write(frame)
+
+    def _open_writer(self, frame):
+        # El writer se abre con el primer frame del stream principal para fijar su resolución
+        if self._capture_stream != MAIN_STREAM:
+            return False
+        self.out = AsyncVideoWriter(
+            self.record_path,
+            RECORD_FPS,
+            max_queue=self.settings.get("record_queue_size", 60),
+            policy=self.settings.get("record_queue_policy", "drop_oldest"),
+            size=(frame.shape[1], frame.shape[0]),
+            preroll=self._pending_preroll,
+        )
+        self._pending_preroll = []
+        self.last_write = 0
+        return True
+
+    def _preroll_due(self, now):
+        # Solo el substream: comprimir el principal a resolución completa no compensa para unos segundos previos
+        return self._capture_stream == SUB_STREAM and self.preroll.due(now)
+
+    def _configure_preroll(self):
+        self.preroll.seconds = self.settings.get("preroll_seconds", 0.0)
+        self.preroll.max_bytes = int(self.settings.get("preroll_max_mb", 32.0) * 1024 ** 2)
+        if not self.preroll.enabled:
+            self.preroll.clear()
+
+    def preroll_stats(self):
+        return self.preroll.stats()
+
+    def recording_stats(self):
+        """Métricas del escritor en modo "encode"; None si no hay uno activo."""
+        out = self.out
+        return out.stats() if out is not None else None
+
+    def _use_stream_copy(self):
+        return self.settings.get("record_mode", "copy") == "copy" and ffmpeg_available()
+
+    def _check_recorder(self):
+        # ffmpeg puede terminar por su cuenta (credenciales, corte de red...)
+        recorder = self.recorder
+        if recorder is not None and not recorder.is_running():
+            with self.writer_lock:
+                if self.recorder is recorder:
+                    recorder.stop()
+                    self._finish_media_entry()
+                    self.recorder = None
+                    self.recording = False
 
-    def toggle_record(self):
+    def _write_preroll_companion(self):
+        # ffmpeg -c copy no puede anteponer frames decodificados: el pre-evento va en un fichero aparte
+        preroll = self.preroll.snapshot()
+        if not preroll:
+            return
+        path = self.record_path.with_name(f"{self.record_path.stem}_previo.mp4")
+        writer = AsyncVideoWriter(path, RECORD_FPS, preroll=preroll)
+        writer.close()
+        now = time.time()
+        self._index_media(path, "video", now - self.preroll.stats()["seconds"], ended_at=now)
+        self._finish_media_entry(writer.join, path, now)
+
+    def _index_media(self, path, kind, started_at, trigger=None, **fields):
+        media_index.add(
+            path,
+            kind,
+            self.mac,
+            trigger or self.record_trigger or "manual",
+            started_at,
+            tag=self.tag,
+            **fields,
+        )
+
+    def _finish_media_entry(self, wait=None, path=None, ended_at=None):
+        """Completa en el índice la grabación en curso cuando su fichero queda cerrado.
+
+        `wait` bloquea hasta que el escritor termina; se ejecuta en un hilo aparte
+        (no daemon) para no frenar a quien para la grabación.
+        """
+        path = path or self.record_path
+        ended_at = ended_at or time.time()
+
+        def finish():
+            if wait is not None:
+                wait()
+            _finish_indexed_file(path, ended_at)
+
+        threading.Thread(target=finish, name=f"MediaIndex-{path.name}").start()
+
+    def start_recording(self, trigger="manual"):
+        """Empieza a grabar; `trigger` indica quién la pidió ("manual", "motion"...)."""
         with self.writer_lock:
-            if not self.recording and self.frame is not None:
-                h, w, _ = self.frame.shape
-                output_dir = self._get_media_output_dir()
-                filename = output_dir / self._build_media_filename("video", "mp4")
-                self.out = cv2.VideoWriter(
-                    str(filename),
-                    cv2.VideoWriter_fourcc(*"mp4v"),
-                    RECORD_FPS,
-                    (w, h),
-                )
-                if not self.out.isOpened():
-                    self.out = None
-                    self.recording = False
+            if self.recording or self.frame is None:
+                return False
+            output_dir = self._get_media_output_dir()
+            self.record_trigger = trigger
+            self.record_started_at = time.time()
+            if self._use_stream_copy():
+                container = self.settings.get("record_container", "mp4")
+                self.record_path = output_dir / self._build_media_filename("video", container)
+                url = self._stream_url(MAIN_STREAM)
+                recorder = StreamCopyRecorder(url, self.record_path)
+                if not url or not recorder.start():
                     return False
-
+                self.recorder = recorder
                 self.recording = True
-                self.last_write = time.time()
+                self._index_media(self.record_path, "video", self.record_started_at)
+                self._write_preroll_companion()
                 return True
 
+            self.record_path = output_dir / self._build_media_filename("video", "mp4")
+            self._pending_preroll = self.preroll.snapshot()
+            self.recording = True
+            # El vídeo empieza con el pre-evento, antes de pulsar "Grabar"
+            self._index_media(
+                self.record_path, "video", self.record_started_at - self.preroll.stats()["seconds"]
+            )
+            self.acquire_main_stream("record")
+            return True
+
+    def stop_recording(self):
+        with self.writer_lock:
+            if not self.recording:
+                return False
             self.recording = False
+            self.record_trigger = None
+            if self.recorder is not None:
+                # ffmpeg tarda en cerrar el contenedor: se espera fuera de la GUI
+                self._finish_media_entry(self.recorder.stop)
+                self.recorder = None
+                return True
             if self.out:
-                self.out.release()
+                # close() no bloquea: el hilo del escritor vacía la cola y cierra el fichero
+                self.out.close()
+                self._finish_media_entry(self.out.join)
                 self.out = None
+            else:
+                # Nunca llegó un frame del stream principal: no hay fichero y se quita del índice
+                self._finish_media_entry()
+            self.release_main_stream("record")
             return True
 
-    def capture_photo(self):
-        with self.capture_lock:
-            if self.frame is None:
-                return False, "Sin imagen disponible"
-            frame_copy = self.frame.copy()
+    def toggle_record(self):
+        if self.recording:
+            return self.stop_recording()
+        return self.start_recording()
+
+    def _wait_fresh_frame(self):
+        latest = self.frame_slot.latest()
+        self.request_frame()
+        return self.frame_slot.wait_newer(latest.seq if latest is not None else 0, PHOTO_FRAME_TIMEOUT)
+
+    def snapshot_bytes(self, latest):
+        """(extensión, bytes, (ancho, alto)) de `latest` codificado según los ajustes de foto."""
+        return encode_snapshot(
+            latest.image,
+            self.settings.get("snapshot_format", "jpg"),
+            self.settings.get("snapshot_quality", 90),
+            self.settings.get("snapshot_max_width", 0),
+        )
 
+    def save_snapshot(self, latest, trigger="manual", suffix=""):
+        """Codifica y guarda `latest` según los ajustes de foto; devuelve la ruta."""
+        return self.write_snapshot(latest, self.snapshot_bytes(latest), trigger, suffix)
+
+    def write_snapshot(self, latest, encoded, trigger="manual", suffix="", timestamp=None):
+        """Escribe una foto ya codificada; `timestamp` fija la hora del nombre (por defecto, la del frame)."""
+        extension, data, (width, height) = encoded
         output_dir = self._get_media_output_dir()
-        photo_path = output_dir / self._build_media_filename("foto", "jpg")
-        saved = cv2.imwrite(str(photo_path), frame_copy)
-        if not saved:
+        photo_path = output_dir / self._build_media_filename(
+            "foto", extension, timestamp or latest.timestamp, suffix
+        )
+        photo_path.write_bytes(data)
+        self._index_media(
+            photo_path,
+            "photo",
+            latest.timestamp,
+            trigger=trigger,
+            ended_at=latest.timestamp,
+            width=width,
+            height=height,
+            size_bytes=len(data),
+        )
+        return photo_path
+
+    def capture_photo(self, trigger="manual"):
+        latest = self._wait_fresh_frame()
+        if latest is None:
+            return False, "Sin imagen disponible"
+        try:
+            photo_path = self.save_snapshot(latest, trigger)
+        except (OSError, ValueError):
             return False, "No se pudo guardar la foto"
         return True, str(photo_path)
 
+    def capture_photo_async(self, on_done, trigger="manual"):
+        """Como capture_photo pero en el pool de fotos; `on_done(ok, mensaje)` se llama desde el worker."""
+
+        def job():
+            on_done(*self.capture_photo(trigger))
+
+        snapshot_pool.submit(job)
+
+    def capture_burst(self, on_done, count=None, interval=None):
+        """Ráfaga de `count` fotos separadas `interval` segundos, sin bloquear a quien llama.
+
+        Un hilo marca el ritmo y cada frame se codifica en el pool de fotos, así
+        que la codificación no retrasa la siguiente toma.
+        """
+        count = count or self.settings.get("burst_count", 5)
+        interval = interval if interval is not None else self.settings.get("burst_interval_ms", 200) / 1000
+
+        def run():
+            pending = []
+            next_shot = time.monotonic()
+            last_seq = None
+            for shot in range(count):
+                time.sleep(max(0.0, next_shot - time.monotonic()))
+                next_shot += interval
+                latest = self._wait_fresh_frame()
+                if latest is None or latest.seq == last_seq:
+                    continue
+                last_seq = latest.seq
+                pending.append(snapshot_pool.submit(self.save_snapshot, latest, "burst", f"_{shot + 1:02d}"))
+
+            saved = []
+            for future in pending:
+                try:
+                    saved.append(future.result())
+                except (OSError, ValueError):
+                    pass
+            if not saved:
+                on_done(False, "No se pudo guardar la ráfaga")
+            else:
+                on_done(True, f"{len(saved)}/{count} fotos en {saved[0].parent}")
+
+        threading.Thread(target=run, daemon=True, name=f"Burst-{self.mac}").start()
+
+    def _continuous_retention(self):
+        retention_days = self.settings.get("retention_days", 0)
+        retention_max_gb = self.settings.get("retention_max_gb", 0)
+        return RetentionPolicy(
+            max_age_seconds=retention_days * 86400 if retention_days > 0 else None,
+            max_bytes=int(retention_max_gb * 1024 ** 3) if retention_max_gb > 0 else None,
+        )
+
+    def _index_segment(self, path, duration):
+        ended_at = path.stat().st_mtime
+        self._index_media(path, "video", ended_at - (duration or 0), trigger="continuous")
+        _finish_indexed_file(path, ended_at)
+
+    def _sync_continuous_recording(self):
+        """Arranca o para la grabación continua según settings (solo con ffmpeg disponible)."""
+        enabled = (
+            self.settings.get("continuous_recording", False)
+            and ffmpeg_available()
+            and not self._stop_event.is_set()
+        )
+        with self.writer_lock:
+            recorder = self.continuous_recorder
+            if enabled and recorder is None and self._stream_url(MAIN_STREAM):
+                self.continuous_recorder = SegmentedRecorder(
+                    lambda: self._stream_url(MAIN_STREAM),
+                    self._get_media_output_dir(),
+                    f"continuo_{self.mac.replace(':', '-')}",
+                    container=self.settings.get("record_container", "mp4"),
+                    segment_seconds=self.settings.get("segment_seconds", 300),
+                    retention=self._continuous_retention(),
+                    on_segment=self._index_segment,
+                    on_delete=media_index.remove,
+                )
+                self.continuous_recorder.start()
+            elif not enabled and recorder is not None:
+                self.continuous_recorder = None
+                # Cerrar el segmento en curso puede tardar unos segundos; no bloquea a quien llama
+                threading.Thread(target=recorder.stop, name=f"SegmentsStop-{self.mac}").start()
+            elif recorder is not None:
+                recorder.retention = self._continuous_retention()
+
+    def _sync_motion_detection(self):
+        """Arranca, para o reconfigura el detector de movimiento según settings."""
+        enabled = self.settings.get("motion_detection", False) and not self._stop_event.is_set()
+        monitor = self.motion_monitor
+        if enabled and monitor is None:
+            monitor = MotionMonitor(self, MotionDetector())
+            self.motion_monitor = monitor
+            monitor.start()
+        elif not enabled and monitor is not None:
+            self.motion_monitor = None
+            monitor.stop()
+            return
+        if monitor is not None:
+            monitor.detector.pixel_threshold = self.settings.get("motion_threshold", 25)
+            monitor.detector.min_area_ratio = self.settings.get("motion_min_area", 0.01)
+            monitor.post_roll = self.settings.get("motion_post_roll", 10.0)
+
+    def motion_stats(self):
+        """Estado del detector de movimiento; None si está desactivado."""
+        monitor = self.motion_monitor
+        if monitor is None:
+            return None
+        return {
+            "active": monitor.active,
+            "analysis_ms": monitor.analysis_ms,
+            "events": len(monitor.events),
+        }
 
     def set_settings(self, settings):
+        if (settings.get("tapo_user"), settings.get("tapo_password")) != (
+            self.settings.get("tapo_user"),
+            self.settings.get("tapo_password"),
+        ):
+            self.ptz.reset()
         self.settings = settings
+        self._configure_preroll()
+        self._sync_continuous_recording()
+        self._sync_motion_detection()
 
     def get_tapo_client(self):
         if Tapo is None:
@@ -234,27 +777,45 @@ class CameraFeed(threading.Thread):
         tapo_password = self.settings.get("tapo_password", "").strip() or self.password_raw
         return Tapo(self.ip, tapo_user, tapo_password)
 
-    def _call_first_available(self, client, method_names, *args):
-        for method_name in method_names:
-            method = getattr(client, method_name, None)
-            if callable(method):
-                return method(*args)
-        raise AttributeError(f"Ningún método disponible entre: {', '.join(method_names)}")
-
-    def move(self, x_axis, y_axis):
-        client = self.get_tapo_client()
-        self._call_first_available(client, ["moveMotor", "move_motor", "move"], x_axis, y_axis)
-
-    def zoom(self, zoom_in):
-        client = self.get_tapo_client()
-        if zoom_in:
-            self._call_first_available(client, ["zoomIn", "zoom_in"])
-        else:
-            self._call_first_available(client, ["zoomOut", "zoom_out"])
+    def move(self, x_axis, y_axis, on_done=None):
+        """Encola un movimiento relativo; `on_done(ok, error)` llega desde el hilo PTZ."""
+        self.ptz.move(x_axis, y_axis, on_done)
+
+    def zoom(self, zoom_in, on_done=None):
+        self.ptz.zoom(zoom_in, on_done)
+
+    def stop_moving(self):
+        """Descarta los movimientos aún no enviados a la cámara."""
+        return self.ptz.discard_moves()
+
+    def ptz_repeat_interval(self):
+        """Cadencia (ms) para repetir movimientos: la configurada, o la ida y vuelta de la cámara si es mayor."""
+        interval = self.settings.get("ptz_repeat_ms", 150)
+        round_trip = self.ptz.round_trip_ms
+        if round_trip is not None:
+            interval = max(interval, round_trip)
+        return int(interval)
+
+    def ptz_busy(self):
+        return self.ptz.queue_depth() > 0
+
+    def ptz_stats(self):
+        """Cola y latencias PTZ; None si todavía no se ha enviado ningún comando."""
+        stats = self.ptz.stats()
+        if not stats["executed"] and not stats["queue_depth"]:
+            return None
+        return stats
 
 
 # ---------------- CAMERA WIDGET ----------------
+def _set_label_text(label, text):
+    if label.text() != text:
+        label.setText(text)
+
+
 class CameraWidget(QWidget):
+    photo_done = pyqtSignal(bool, str)
+
     def __init__(self, feed):
         super().__init__()
         self.feed = feed
@@ -288,10 +849,10 @@ class CameraWidget(QWidget):
 
         self.label.mouseDoubleClickEvent = self.open_window
         self.cam_window = None
+        self.photo_done.connect(self._on_photo_done)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(40)
+        self.renderer = LabelRenderer(self.label, f"tile-{feed.mac}", parent=self)
+        refresh_scheduler.register(self, f"tile-{feed.mac}")
 
         self.connection_timer = QTimer()
         self.connection_timer.timeout.connect(self._minute_connection_check)
@@ -314,44 +875,45 @@ class CameraWidget(QWidget):
             self.btn_record.setText("⏺ Grabar")
 
     def on_capture_photo(self):
-        ok, message = self.feed.capture_photo()
+        self.status.setText("📸 Guardando foto…")
+        self.feed.capture_photo_async(self.photo_done.emit)
+
+    def _on_photo_done(self, ok, message):
         if ok:
             self.status.setText(f"📸 Foto guardada: {message}")
         else:
             self.status.setText(f"❌ {message}")
 
     def update_frame(self):
-        if self.feed.frame is not None:
-            with self.feed.capture_lock:
-                frame = self.feed.frame.copy()
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = QImage(
-                rgb.data,
-                rgb.shape[1],
-                rgb.shape[0],
-                rgb.strides[0],
-                QImage.Format.Format_RGB888,
-            )
-            self.label.setPixmap(
-                QPixmap.fromImage(img).scaled(
-                    self.label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-            )
-            self.status.setText(
-                f"🟢 En línea | IP: {self.feed.ip or 'resolviendo'}"
-                + (" | 🔴 Grabando" if self.feed.recording else "")
-            )
-        else:
-            self.status.setText("🟡 Sin imagen, reconectando…")
+        self.feed.request_frame()
+        latest = self.feed.frame_slot.latest()
+        if latest is None:
+            _set_label_text(self.status, "🟡 Sin imagen, reconectando…")
+            return
+
+        self.renderer.update(latest)
+        _set_label_text(
+            self.status,
+            f"🟢 En línea | IP: {self.feed.ip or 'resolviendo'}"
+            + (" | 🔴 Grabando" if self.feed.recording else ""),
+        )
+        _set_label_text(self.btn_record, "⏹ Detener" if self.feed.recording else "⏺ Grabar")
 
     def open_window(self, event):
         if self.cam_window is None:
             self.cam_window = CameraWindow(self.feed)
         self.cam_window.show()
 
+    def dispose(self):
+        """Libera el renderizado y la ventana grande antes de borrar el widget."""
+        self.renderer.close()
+        refresh_scheduler.unregister(self)
+        if self.cam_window is not None:
+            self.cam_window.renderer.close()
+            refresh_scheduler.unregister(self.cam_window)
+            self.cam_window.close()
+            self.cam_window = None
+
 
 # ---------------- CAMERA WINDOW ----------------
 class CameraWindow(QWidget):
@@ -369,12 +931,14 @@ class CameraWindow(QWidget):
 
         self.btn_record = QPushButton("⏺ Grabar")
         self.btn_capture = QPushButton("📸 Capturar")
+        self.btn_burst = QPushButton("🎞 Ráfaga")
 
         layout = QVBoxLayout(self)
         media_actions = QHBoxLayout()
         media_actions.addStretch()
         media_actions.addWidget(self.btn_record)
         media_actions.addWidget(self.btn_capture)
+        media_actions.addWidget(self.btn_burst)
         media_actions.addStretch()
 
         layout.addLayout(media_actions)
@@ -419,23 +983,33 @@ class CameraWindow(QWidget):
         layout.addWidget(controls_container, alignment=Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status)
 
-        self.btn_up.clicked.connect(lambda: self.send_move(0, 1))
-        self.btn_down.clicked.connect(lambda: self.send_move(0, -1))
-        self.btn_left.clicked.connect(lambda: self.send_move(-1, 0))
-        self.btn_right.clicked.connect(lambda: self.send_move(1, 0))
+        # Mantener pulsada una flecha repite el movimiento hasta soltarla
+        self._hold_direction = None
+        self._hold_repeats = 0
+        self._hold_timer = QTimer(self)
+        self._hold_timer.setSingleShot(True)
+        self._hold_timer.timeout.connect(self._repeat_move)
+        for btn, (x_axis, y_axis) in [
+            (self.btn_up, (0, 1)),
+            (self.btn_down, (0, -1)),
+            (self.btn_left, (-1, 0)),
+            (self.btn_right, (1, 0)),
+        ]:
+            btn.pressed.connect(lambda x_axis=x_axis, y_axis=y_axis: self.start_move(x_axis, y_axis))
+            btn.released.connect(self.stop_move)
         self.btn_center.clicked.connect(lambda: self.send_move(0, 0))
         self.btn_zoom_in.clicked.connect(lambda: self.send_zoom(True))
         self.btn_zoom_out.clicked.connect(lambda: self.send_zoom(False))
         self.btn_record.clicked.connect(self.on_toggle_record)
         self.btn_capture.clicked.connect(self.on_capture_photo)
+        self.btn_burst.clicked.connect(self.on_capture_burst)
 
         if Tapo is None:
             self._set_ptz_enabled(False)
             self.status.setText("⚠️ PTZ deshabilitado: instala pytapo")
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(40)
+        self.renderer = LabelRenderer(self.label, f"window-{feed.mac}", parent=self)
+        refresh_scheduler.register(self, f"window-{feed.mac}")
 
     def _set_ptz_enabled(self, enabled):
         controls = [
@@ -447,25 +1021,47 @@ class CameraWindow(QWidget):
             self.btn_zoom_in,
             self.btn_zoom_out,
         ]
+        if not enabled:
+            self.stop_move()
         for control in controls:
             control.setEnabled(enabled)
 
-    def _run_camera_action(self, action, success_message):
-        def worker():
-            try:
-                action()
-                self.action_result.emit(success_message)
-            except Exception as exc:
-                self.action_result.emit(f"❌ {exc}")
+    def _report_camera_action(self, success_message):
+        def on_done(ok, error):
+            self.action_result.emit(success_message if ok else f"❌ {error}")
 
-        threading.Thread(target=worker, daemon=True, name=f"PTZ-{self.feed.mac}").start()
+        return on_done
 
     def send_move(self, x_axis, y_axis):
-        self._run_camera_action(lambda: self.feed.move(x_axis, y_axis), "✅ Movimiento enviado")
+        self.feed.move(x_axis, y_axis, self._report_camera_action("✅ Movimiento enviado"))
+
+    def start_move(self, x_axis, y_axis):
+        self._hold_direction = (x_axis, y_axis)
+        self._hold_repeats = 0
+        self.send_move(x_axis, y_axis)
+        self._hold_timer.start(self.feed.ptz_repeat_interval())
+
+    def _repeat_move(self):
+        if self._hold_direction is None:
+            return
+        # Sin cola: como mucho un movimiento esperando detrás del que está en curso
+        if not self.feed.ptz_busy():
+            self._hold_repeats += 1
+            self.send_move(*self._hold_direction)
+        self._hold_timer.start(self.feed.ptz_repeat_interval())
+
+    def stop_move(self):
+        if self._hold_direction is None:
+            return
+        self._hold_direction = None
+        self._hold_timer.stop()
+        # Un clic corto conserva su único paso; al soltar tras mantener, lo pendiente sobra
+        if self._hold_repeats:
+            self.feed.stop_moving()
 
     def send_zoom(self, zoom_in):
         message = "✅ Zoom + enviado" if zoom_in else "✅ Zoom - enviado"
-        self._run_camera_action(lambda: self.feed.zoom(zoom_in), message)
+        self.feed.zoom(zoom_in, self._report_camera_action(message))
 
     def on_toggle_record(self):
         ok = self.feed.toggle_record()
@@ -475,30 +1071,32 @@ class CameraWindow(QWidget):
             return
         self.btn_record.setText("⏹ Detener" if self.feed.recording else "⏺ Grabar")
 
-    def on_capture_photo(self):
-        ok, message = self.feed.capture_photo()
+    def _report_photo(self, ok, message):
         self.action_result.emit(f"📸 Foto guardada: {message}" if ok else f"❌ {message}")
 
+    def on_capture_photo(self):
+        self.status.setText("📸 Guardando foto…")
+        self.feed.capture_photo_async(self._report_photo)
+
+    def on_capture_burst(self):
+        self.status.setText("🎞 Capturando ráfaga…")
+        self.feed.capture_burst(
+            lambda ok, message: self.action_result.emit(f"🎞 Ráfaga guardada: {message}" if ok else f"❌ {message}")
+        )
+
     def update_frame(self):
-        if self.feed.frame is not None:
-            with self.feed.capture_lock:
-                frame = self.feed.frame.copy()
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = QImage(
-                rgb.data,
-                rgb.shape[1],
-                rgb.shape[0],
-                rgb.strides[0],
-                QImage.Format.Format_RGB888,
-            )
-            self.label.setPixmap(
-                QPixmap.fromImage(img).scaled(
-                    self.label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-            )
+        self.feed.request_frame()
+        self.renderer.update(self.feed.frame_slot.latest())
+        _set_label_text(self.btn_record, "⏹ Detener" if self.feed.recording else "⏺ Grabar")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.feed.acquire_main_stream("window")
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.stop_move()
+        self.feed.release_main_stream("window")
 
 
 # ---------------- GUARDAR Y CARGAR ----------------
@@ -515,6 +1113,13 @@ def update_settings(partial_settings):
     return current_settings
 
 
+def _coerce_setting(value, default):
+    try:
+        return type(default)(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def load_settings():
     settings_file = Path(__file__).with_name(SETTINGS_FILE)
 
@@ -523,16 +1128,15 @@ def load_settings():
             data = json.load(f)
             if isinstance(data, dict):
                 return {
-                    "tapo_user": str(data.get("tapo_user", "")),
-                    "tapo_password": str(data.get("tapo_password", "")),
-                    "media_directory": str(data.get("media_directory", "")),
+                    key: _coerce_setting(data.get(key, default), default)
+                    for key, default in DEFAULT_SETTINGS.items()
                 }
     except FileNotFoundError:
         pass
     except json.JSONDecodeError:
         pass
 
-    return {"tapo_user": "", "tapo_password": "", "media_directory": ""}
+    return dict(DEFAULT_SETTINGS)
 
 
 def save_cameras(widgets):
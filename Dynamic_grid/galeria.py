@@ -0,0 +1,356 @@
+import bisect
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, pyqtSignal
+
+from funciones import media_index
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".wmv", ".webm", ".m4v"}
+
+# Ficheros que el hilo de enumeración entrega de golpe a la GUI
+SCAN_BATCH_SIZE = 2000
+# Ficheros que el borrado masivo elimina entre avisos a la GUI
+DELETE_BATCH_SIZE = 100
+# Filas que se hacen visibles al modelo cada vez que la vista pide más (fetchMore)
+FETCH_BATCH_SIZE = 200
+
+
+class MediaItem(NamedTuple):
+    path: str
+    name: str
+    is_video: bool
+    # MediaEntry del índice cuando el listado viene de una búsqueda
+    entry: object = None
+
+
+def _media_item(path, entry=None):
+    name = os.path.basename(path)
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix not in IMAGE_EXTENSIONS and suffix not in VIDEO_EXTENSIONS:
+        return None
+    return MediaItem(path, name, suffix in VIDEO_EXTENSIONS, entry)
+
+
+def scan_directory(directory, cancelled):
+    """Ficheros de media de la carpeta ordenados por nombre.
+
+    os.scandir resuelve "es fichero" con el tipo que ya trae el listado, sin un
+    stat() por entrada; el filtrado por extensión es solo sobre el nombre.
+    """
+    items = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if cancelled():
+                return []
+            if not entry.is_file():
+                continue
+            item = _media_item(os.path.abspath(entry.path))
+            if item is not None:
+                items.append(item)
+    items.sort(key=lambda item: item.name.lower())
+    return items
+
+
+def describe_entry(entry):
+    started = datetime.fromtimestamp(entry.started_at).strftime("%d/%m/%Y %H:%M:%S")
+    details = [f"Cámara: {entry.tag or entry.mac}", f"Inicio: {started}", f"Origen: {entry.trigger}"]
+    if entry.duration:
+        details.append(f"Duración: {entry.duration:.0f} s")
+    if entry.width and entry.height:
+        details.append(f"Resolución: {entry.width}x{entry.height}")
+    if entry.size_bytes:
+        details.append(f"Tamaño: {entry.size_bytes / 1024 ** 2:.1f} MB")
+    return "\n".join(details)
+
+
+class MediaListModel(QAbstractListModel):
+    """Listado de media para un QListView, cargado en segundo plano y sin QListWidgetItem.
+
+    Un hilo enumera la carpeta (o consulta el índice) y entrega los resultados por
+    lotes; el modelo solo expone a la vista las filas que va pidiendo con fetchMore.
+    Con `placeholder` y sin filas, muestra ese texto como única fila sin ruta.
+    """
+
+    batch_ready = pyqtSignal(int, object, bool)
+    sync_ready = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        # Nombres en minúsculas, en paralelo a _items, para insertar por orden con bisect
+        self._keys = []
+        self._visible = 0
+        self._checked = set()
+        self._checkable = False
+        self._generation = 0
+        self._loading = False
+        self.placeholder = ""
+        self.batch_ready.connect(self._on_batch)
+        self.sync_ready.connect(self._on_sync)
+
+    # ---- QAbstractListModel ----
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._visible == 0 and self.placeholder:
+            return 1
+        return self._visible
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if self._visible == 0:
+            return self.placeholder if role == Qt.ItemDataRole.DisplayRole else None
+
+        item = self._items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{'🎬' if item.is_video else '🖼️'} {item.name}"
+        if role == Qt.ItemDataRole.UserRole:
+            return item.path
+        if role == Qt.ItemDataRole.ToolTipRole and item.entry is not None:
+            return describe_entry(item.entry)
+        if role == Qt.ItemDataRole.CheckStateRole and self._checkable:
+            return Qt.CheckState.Checked if item.path in self._checked else Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not self._checkable or self._visible == 0:
+            return False
+        path = self._items[index.row()].path
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self._checked.add(path)
+        else:
+            self._checked.discard(path)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if self._checkable and self._visible:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._visible < len(self._items)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, len(self._items) - self._visible)
+        if count <= 0:
+            return
+        if self._visible == 0 and self.placeholder:
+            # La fila de aviso deja paso a los resultados
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self.placeholder = ""
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), self._visible, self._visible + count - 1)
+        self._visible += count
+        self.endInsertRows()
+
+    # ---- Carga ----
+    def _reset(self, placeholder=""):
+        self._generation += 1
+        self.beginResetModel()
+        self._items = []
+        self._keys = []
+        self._visible = 0
+        self._checked.clear()
+        self.placeholder = placeholder
+        self.endResetModel()
+
+    def show_message(self, message):
+        self._reset(message)
+        self._loading = False
+
+    def load_directory(self, directory):
+        self._start(lambda cancelled: scan_directory(directory, cancelled))
+
+    def load_query(self, **query):
+        def job(_cancelled):
+            entries = media_index.query(**query)
+            return [item for item in (_media_item(entry.path, entry) for entry in entries) if item]
+
+        self._start(job)
+
+    def _start(self, job):
+        self._reset("Cargando…")
+        generation = self._generation
+        self._loading = True
+
+        def cancelled():
+            return generation != self._generation
+
+        def worker():
+            try:
+                items = job(cancelled)
+            except OSError:
+                items = []
+            for start in range(0, len(items), SCAN_BATCH_SIZE):
+                if cancelled():
+                    return
+                self.batch_ready.emit(generation, items[start:start + SCAN_BATCH_SIZE], False)
+            self.batch_ready.emit(generation, [], True)
+
+        threading.Thread(target=worker, daemon=True, name="MediaScan").start()
+
+    def _on_batch(self, generation, items, done):
+        if generation != self._generation:
+            return
+        self._items.extend(items)
+        self._keys.extend(item.name.lower() for item in items)
+        if self._visible < FETCH_BATCH_SIZE and self.canFetchMore():
+            self.fetchMore()
+        if done:
+            self._loading = False
+            if not self._items:
+                self._reset("No se encontraron fotos ni videos en la carpeta.")
+
+    # ---- Cambios en la carpeta ----
+    def sync_directory(self, directory):
+        """Vuelve a listar la carpeta en segundo plano y aplica solo las diferencias.
+
+        Los nombres nuevos entran como inserciones de una fila en su posición y los
+        desaparecidos se quitan; no hay reset del modelo ni se pierde la selección.
+        """
+        if self._loading:
+            return False
+        generation = self._generation
+
+        def worker():
+            try:
+                items = scan_directory(directory, lambda: generation != self._generation)
+            except OSError:
+                return
+            self.sync_ready.emit(generation, items)
+
+        threading.Thread(target=worker, daemon=True, name="MediaSync").start()
+        return True
+
+    def _on_sync(self, generation, items):
+        if generation != self._generation or self._loading:
+            return
+        current = {item.path for item in self._items}
+        listed = {item.path for item in items}
+        self.remove_paths(current - listed)
+        for item in items:
+            if item.path not in current:
+                self.insert_item(item)
+
+    def insert_item(self, item):
+        if self._visible == 0 and self.placeholder:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self.placeholder = ""
+            self.endRemoveRows()
+        key = item.name.lower()
+        row = bisect.bisect_left(self._keys, key)
+        if row < self._visible or self._visible == len(self._items):
+            # Dentro de la parte ya expuesta (o al final de una lista completa): la vista la ve al momento
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._items.insert(row, item)
+            self._keys.insert(row, key)
+            self._visible += 1
+            self.endInsertRows()
+        else:
+            self._items.insert(row, item)
+            self._keys.insert(row, key)
+
+    # ---- Selección y borrado ----
+    def set_checkable(self, checkable):
+        self._checkable = checkable
+        self._checked.clear()
+        if self._visible:
+            self.dataChanged.emit(self.index(0), self.index(self._visible - 1), [Qt.ItemDataRole.CheckStateRole])
+
+    def checked_paths(self):
+        return [Path(path) for path in self._checked]
+
+    def remove_paths(self, paths):
+        """Quita del modelo las filas de `paths` sin volver a listar la carpeta."""
+        targets = {str(path) for path in paths}
+        if not targets:
+            return
+        rows = [row for row, item in enumerate(self._items) if item.path in targets]
+        # De abajo arriba, agrupando filas contiguas en una sola señal
+        for first, last in reversed(_contiguous_ranges(rows)):
+            if first < self._visible:
+                visible_last = min(last, self._visible - 1)
+                self.beginRemoveRows(QModelIndex(), first, visible_last)
+                del self._items[first:last + 1]
+                del self._keys[first:last + 1]
+                self._visible -= visible_last - first + 1
+                self.endRemoveRows()
+            else:
+                del self._items[first:last + 1]
+                del self._keys[first:last + 1]
+        self._checked -= targets
+        if not self._items and not self._loading:
+            self._reset("No se encontraron fotos ni videos en la carpeta.")
+
+
+def _contiguous_ranges(rows):
+    ranges = []
+    for row in sorted(rows):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+
+# ---------------- BORRADO MASIVO ----------------
+class BulkDeleteJob(QObject):
+    """Borra ficheros en un hilo aparte y avisa por lotes, con cancelación.
+
+    `batch_deleted(rutas)` llega cada DELETE_BATCH_SIZE ficheros (ya quitados del
+    índice) para retirar esas filas; `finished(errores, cancelado)` al terminar.
+    """
+
+    progress = pyqtSignal(int, int)
+    batch_deleted = pyqtSignal(object)
+    finished = pyqtSignal(object, bool)
+
+    def __init__(self, paths, batch_size=DELETE_BATCH_SIZE, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.batch_size = batch_size
+        self._cancel_event = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True, name="MediaDelete").start()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def _run(self):
+        errors = []
+        batch = []
+        total = len(self.paths)
+        for done, path in enumerate(self.paths, start=1):
+            if self._cancel_event.is_set():
+                break
+            try:
+                path.unlink(missing_ok=False)
+                batch.append(path)
+            except FileNotFoundError as exc:
+                # Ya no está en disco: también sobra en la galería
+                batch.append(path)
+                errors.append(f"{path.name}: {exc}")
+            except OSError as exc:
+                errors.append(f"{path.name}: {exc}")
+            if len(batch) >= self.batch_size or done == total:
+                self._flush(batch)
+                batch = []
+                self.progress.emit(done, total)
+        self._flush(batch)
+        self.finished.emit(errors, self._cancel_event.is_set())
+
+    def _flush(self, batch):
+        if batch:
+            media_index.remove(batch)
+            self.batch_deleted.emit(batch)
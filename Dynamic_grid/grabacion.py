@@ -0,0 +1,511 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from estadisticas import smooth
+
+FFMPEG_BIN = "ffmpeg"
+FFMPEG_STOP_TIMEOUT = 5
+
+WRITER_QUEUE_SIZE = 60
+WRITER_POLICY_DROP_OLDEST = "drop_oldest"
+WRITER_POLICY_BLOCK = "block"
+# Cada cuánto comprueban el cierre el hilo del escritor y una escritura bloqueada
+WRITER_CLOSE_POLL = 0.2
+
+SEGMENT_SECONDS = 300
+PARTIAL_DIRNAME = ".parcial"
+SEGMENT_POLL_SECONDS = 2
+SEGMENT_RESTART_DELAY = 5
+
+PREROLL_JPEG_QUALITY = 80
+PREROLL_WORKERS = 2
+
+_CLOSE = object()
+
+
+def ffmpeg_available(ffmpeg=FFMPEG_BIN):
+    return shutil.which(ffmpeg) is not None
+
+
+def _ffmpeg_copy_args(ffmpeg, url, container):
+    args = [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-rtsp_transport", "tcp",
+        "-i", url,
+        "-map", "0:v",
+    ]
+    # El audio de Tapo (PCM A-law) no cabe en MP4 sin recodificar; MKV lo admite tal cual
+    if container == "mkv":
+        args += ["-map", "0:a?"]
+    return args + ["-c", "copy"]
+
+
+def _stop_ffmpeg(process, timeout=FFMPEG_STOP_TIMEOUT):
+    """Pide a ffmpeg que cierre el fichero ("q") para que escriba el índice final."""
+    if process.poll() is None:
+        try:
+            process.stdin.write(b"q")
+            process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.terminate()
+            process.wait()
+    if process.stdin:
+        process.stdin.close()
+
+
+def _start_ffmpeg(command):
+    try:
+        return subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+
+# ---------------- GRABACIÓN SIN RECODIFICAR ----------------
+class StreamCopyRecorder:
+    """Graba el RTSP de la cámara con `ffmpeg -c copy`: remultiplexa los paquetes H.264/H.265
+    al contenedor sin decodificar ni codificar nada.
+    """
+
+    def __init__(self, url, path, ffmpeg=FFMPEG_BIN):
+        self.url = url
+        self.path = path
+        self.ffmpeg = ffmpeg
+        self._process = None
+
+    def _build_command(self):
+        container = Path(self.path).suffix.lower().lstrip(".")
+        return _ffmpeg_copy_args(self.ffmpeg, self.url, container) + ["-y", str(self.path)]
+
+    def start(self):
+        self._process = _start_ffmpeg(self._build_command())
+        return self._process is not None
+
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def stop(self, timeout=FFMPEG_STOP_TIMEOUT):
+        if self._process is not None:
+            _stop_ffmpeg(self._process, timeout)
+
+
+# ---------------- GRABACIÓN CONTINUA POR SEGMENTOS ----------------
+class RetentionPolicy:
+    """Borra primero los segmentos más antiguos hasta cumplir edad máxima y bytes totales."""
+
+    def __init__(self, max_age_seconds=None, max_bytes=None):
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+
+    def apply(self, files):
+        entries = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        deleted = []
+        total_bytes = sum(size for _mtime, size, _path in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            too_old = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            too_big = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not too_old and not too_big:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            deleted.append(path)
+        return deleted
+
+
+class SegmentedRecorder:
+    """Grabación 24/7 en segmentos de duración fija con `ffmpeg -f segment -c copy`.
+
+    ffmpeg escribe en `.parcial/` y anota cada segmento terminado en una lista CSV;
+    un hilo los mueve a la carpeta final con `os.replace` (atómico) y aplica la
+    retención. Si el proceso cae, se pierde como mucho el segmento en curso.
+    """
+
+    def __init__(
+        self,
+        url_provider,
+        output_dir,
+        name_prefix,
+        container="mp4",
+        segment_seconds=SEGMENT_SECONDS,
+        retention=None,
+        ffmpeg=FFMPEG_BIN,
+        on_segment=None,
+        on_delete=None,
+    ):
+        self.url_provider = url_provider
+        self.output_dir = Path(output_dir)
+        self.partial_dir = self.output_dir / PARTIAL_DIRNAME
+        self.name_prefix = name_prefix
+        self.container = container
+        self.segment_seconds = segment_seconds
+        self.retention = retention
+        self.ffmpeg = ffmpeg
+        # on_segment(ruta, duración en s) por segmento terminado; on_delete(rutas) tras la retención
+        self.on_segment = on_segment
+        self.on_delete = on_delete
+
+        self.list_path = self.partial_dir / f"{name_prefix}.csv"
+        self.completed_segments = 0
+        self.deleted_segments = 0
+
+        self._process = None
+        self._list_offset = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _build_command(self, url):
+        pattern = self.partial_dir / f"{self.name_prefix}_%Y%m%d_%H%M%S.{self.container}"
+        return _ffmpeg_copy_args(self.ffmpeg, url, self.container) + [
+            "-f", "segment",
+            "-segment_time", str(self.segment_seconds),
+            "-segment_format", "matroska" if self.container == "mkv" else self.container,
+            "-reset_timestamps", "1",
+            "-strftime", "1",
+            "-segment_list", str(self.list_path),
+            "-segment_list_type", "csv",
+            str(pattern),
+        ]
+
+    def segments(self):
+        return list(self.output_dir.glob(f"{self.name_prefix}_*.{self.container}"))
+
+    def start(self):
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Segments-{self.name_prefix}")
+        self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _recover_leftovers(self):
+        """Rescata lo que dejó una ejecución anterior antes de que ffmpeg reescriba la lista.
+
+        Los segmentos que ya figuran en la lista CSV están cerrados aunque no se
+        llegaran a mover; solo se borra el que estaba a medias, que no se puede reproducir.
+        """
+        self._list_offset = 0
+        self._collect_completed(final=True)
+        for leftover in self.partial_dir.glob(f"{self.name_prefix}_*"):
+            leftover.unlink(missing_ok=True)
+        self.list_path.unlink(missing_ok=True)
+
+    def _run(self):
+        self._recover_leftovers()
+        while not self._stop_event.is_set():
+            if self._process is None or self._process.poll() is not None:
+                # ffmpeg ha terminado (o no ha arrancado): su lista ya no va a crecer
+                self._collect_completed(final=True)
+                self._launch()
+            self._collect_completed()
+            self._stop_event.wait(SEGMENT_POLL_SECONDS if self._process else SEGMENT_RESTART_DELAY)
+
+        if self._process is not None:
+            _stop_ffmpeg(self._process)
+            self._process = None
+        self._collect_completed(final=True)
+
+    def _launch(self):
+        url = self.url_provider()
+        self._process = _start_ffmpeg(self._build_command(url)) if url else None
+        # ffmpeg reescribe la lista al arrancar
+        self._list_offset = 0
+
+    def _collect_completed(self, final=False):
+        try:
+            with open(self.list_path, "rb") as f:
+                f.seek(self._list_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Lo que sigue al último "\n" es una línea que ffmpeg aún está escribiendo: queda para la próxima
+        # pasada, salvo que ffmpeg ya no esté (final) y nadie la vaya a terminar
+        complete = data if final else data[:data.rfind(b"\n") + 1]
+        self._list_offset += len(complete)
+
+        moved = False
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            # Cada línea es "fichero,inicio,fin" en segundos del stream
+            fields = line.strip().split(",")
+            filename = os.path.basename(fields[0])
+            source = self.partial_dir / filename
+            if not filename or not source.exists():
+                continue
+            target = self.output_dir / filename
+            os.replace(source, target)
+            self.completed_segments += 1
+            moved = True
+            if self.on_segment is not None:
+                try:
+                    duration = float(fields[2]) - float(fields[1])
+                except (IndexError, ValueError):
+                    duration = None
+                self.on_segment(target, duration)
+
+        if moved and self.retention is not None:
+            deleted = self.retention.apply(self.segments())
+            self.deleted_segments += len(deleted)
+            if deleted and self.on_delete is not None:
+                self.on_delete(deleted)
+
+
+# ---------------- ESCRITOR ASÍNCRONO ----------------
+class AsyncVideoWriter:
+    """cv2.VideoWriter en su propio hilo con una cola acotada.
+
+    El hilo de captura solo encola referencias a frames (de solo lectura, sin copia).
+    Con la cola llena, `policy="drop_oldest"` descarta el frame más antiguo y
+    `policy="block"` espera a que haya hueco, contando cada espera.
+    """
+
+    def __init__(
+        self,
+        path,
+        fps,
+        fourcc="mp4v",
+        max_queue=WRITER_QUEUE_SIZE,
+        policy=WRITER_POLICY_DROP_OLDEST,
+        size=None,
+        preroll=(),
+    ):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.policy = policy
+        # (ancho, alto) del vídeo; si no se indica se toma del primer frame
+        self.size = size
+        # JPEGs del PreEventBuffer que se escriben antes que cualquier frame en vivo
+        self._preroll = list(preroll)
+        self.failed = False
+
+        self.written_frames = 0
+        self.dropped_frames = 0
+        self.blocked_puts = 0
+        self.encode_ms = 0.0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closing = threading.Event()
+        # No es daemon: al cerrar la app se vacía la cola antes de salir
+        self._thread = threading.Thread(target=self._run, name=f"VideoWriter-{path}")
+        self._thread.start()
+
+    def write(self, frame):
+        if self._closing.is_set():
+            return
+        if self.policy == WRITER_POLICY_BLOCK:
+            try:
+                self._queue.put_nowait(frame)
+            except queue.Full:
+                self.blocked_puts += 1
+                # La espera se abandona si entretanto se cierra el escritor
+                while not self._closing.is_set():
+                    try:
+                        self._queue.put(frame, timeout=WRITER_CLOSE_POLL)
+                        return
+                    except queue.Full:
+                        pass
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """Marca el cierre y vuelve enseguida, aunque la cola esté llena.
+
+        El hilo escribe lo que quede en la cola y libera el fichero; el aviso en la
+        cola solo lo despierta antes si hay hueco.
+        """
+        self._closing.set()
+        try:
+            self._queue.put_nowait(_CLOSE)
+        except queue.Full:
+            pass
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "written_frames": self.written_frames,
+            "dropped_frames": self.dropped_frames,
+            "blocked_puts": self.blocked_puts,
+            "encode_ms": self.encode_ms,
+        }
+
+    def _run(self):
+        writer = None
+        for encoded in self._preroll:
+            frame = cv2.imdecode(np.frombuffer(encoded, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                writer = self._write(writer, frame)
+        self._preroll = []
+
+        while True:
+            try:
+                frame = self._queue.get(timeout=WRITER_CLOSE_POLL)
+            except queue.Empty:
+                if self._closing.is_set():
+                    break
+                continue
+            if frame is _CLOSE:
+                break
+            writer = self._write(writer, frame)
+
+        if writer is not None:
+            writer.release()
+
+    def _write(self, writer, frame):
+        if self.failed:
+            return writer
+        if writer is None:
+            if self.size is None:
+                self.size = (frame.shape[1], frame.shape[0])
+            writer = cv2.VideoWriter(str(self.path), cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size)
+            if not writer.isOpened():
+                self.failed = True
+                return None
+
+        started_at = time.perf_counter()
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            # El pre-evento suele venir del substream: se escala a la resolución del vídeo
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_LINEAR)
+        writer.write(frame)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        self.encode_ms = smooth(self.encode_ms, elapsed_ms)
+        self.written_frames += 1
+        return writer
+
+
+# ---------------- BUFFER PRE-EVENTO ----------------
+# Compresión JPEG del pre-evento de todas las cámaras, fuera de sus hilos de captura
+_preroll_pool = ThreadPoolExecutor(max_workers=PREROLL_WORKERS, thread_name_prefix="PreEvent")
+
+
+class PreEventBuffer:
+    """Últimos segundos de vídeo en memoria como JPEG, para empezar las grabaciones antes de "Grabar".
+
+    Se guardan frames comprimidos (normalmente del substream) a `fps`, nunca frames
+    decodificados a resolución completa; el tamaño queda acotado por segundos y bytes.
+    """
+
+    def __init__(self, seconds, max_bytes, fps, quality=PREROLL_JPEG_QUALITY):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.interval = 1 / fps
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._frames = deque()
+        self._bytes = 0
+        self._last_push = 0.0
+        self._encoding = False
+        self.skipped_frames = 0
+
+    @property
+    def enabled(self):
+        return self.seconds > 0 and self.max_bytes > 0
+
+    def due(self, now):
+        return self.enabled and now - self._last_push >= self.interval
+
+    def push(self, frame, timestamp):
+        """Encola el frame para comprimirlo fuera del hilo de captura, que nunca espera al JPEG.
+
+        Si el anterior aún no ha terminado, este se descarta: el buffer pierde
+        fluidez antes que la captura latencia.
+        """
+        self._last_push = timestamp
+        with self._lock:
+            if self._encoding:
+                self.skipped_frames += 1
+                return
+            self._encoding = True
+        _preroll_pool.submit(self._encode, frame, timestamp)
+
+    def _encode(self, frame, timestamp):
+        try:
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        finally:
+            with self._lock:
+                self._encoding = False
+        if not ok:
+            return
+        data = encoded.tobytes()
+        with self._lock:
+            self._frames.append((timestamp, data))
+            self._bytes += len(data)
+            self._expire(timestamp)
+
+    def _expire(self, now):
+        # Con el lock tomado. Sin frames nuevos (stream principal, cámara caída) los viejos caducan igual
+        while self._frames and (self._frames[0][0] < now - self.seconds or self._bytes > self.max_bytes):
+            _ts, old = self._frames.popleft()
+            self._bytes -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.time())
+            return [data for _ts, data in self._frames]
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.time())
+            span = self._frames[-1][0] - self._frames[0][0] if self._frames else 0.0
+            return {
+                "frames": len(self._frames),
+                "seconds": span,
+                "bytes": self._bytes,
+                "skipped_frames": self.skipped_frames,
+            }
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    tag TEXT NOT NULL DEFAULT '',
+    trigger TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    size_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS media_mac_started ON media (mac, started_at);
+CREATE INDEX IF NOT EXISTS media_started ON media (started_at);
+"""
+
+
+class MediaEntry(NamedTuple):
+    path: str
+    kind: str
+    mac: str
+    tag: str
+    trigger: str
+    started_at: float
+    ended_at: float
+    duration: float
+    width: int
+    height: int
+    size_bytes: int
+
+
+class MediaIndex:
+    """Índice SQLite de fotos y vídeos: qué cámara, cuándo, cuánto dura y por qué existe.
+
+    Una única conexión compartida por los hilos de captura, grabación y la GUI,
+    serializada con un lock. Las rutas se guardan absolutas.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def add(
+        self,
+        path,
+        kind,
+        mac,
+        trigger,
+        started_at,
+        tag="",
+        ended_at=None,
+        width=None,
+        height=None,
+        size_bytes=None,
+    ):
+        duration = ended_at - started_at if ended_at is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(Path(path).resolve()),
+                    kind,
+                    mac,
+                    tag,
+                    trigger,
+                    started_at,
+                    ended_at,
+                    duration,
+                    width,
+                    height,
+                    size_bytes,
+                ),
+            )
+            self._conn.commit()
+
+    def finish(self, path, ended_at, width=None, height=None, size_bytes=None):
+        """Cierra una grabación: hora de fin, duración y lo que se sepa del fichero final."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE media SET ended_at = ?, duration = ? - started_at, "
+                "width = COALESCE(?, width), height = COALESCE(?, height), size_bytes = ? "
+                "WHERE path = ?",
+                (ended_at, ended_at, width, height, size_bytes, str(Path(path).resolve())),
+            )
+            self._conn.commit()
+
+    def remove(self, paths):
+        rows = [(str(Path(path).resolve()),) for path in paths]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM media WHERE path = ?", rows)
+            self._conn.commit()
+
+    def query(self, mac=None, since=None, until=None, directory=None, kind=None):
+        """Entradas que se solapan con [since, until), de una cámara y/o carpeta, por orden de inicio."""
+        clauses = []
+        params = []
+        if mac is not None:
+            clauses.append("mac = ?")
+            params.append(mac)
+        if since is not None:
+            # Sin fin todavía es una grabación en curso: llega hasta ahora
+            clauses.append("COALESCE(ended_at, ?) >= ?")
+            params.extend([time.time(), since])
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        if directory is not None:
+            # Solo ficheros directamente dentro de la carpeta, no en subcarpetas
+            prefix = os.path.join(str(Path(directory).resolve()), "")
+            clauses.append("substr(path, 1, ?) = ? AND instr(substr(path, ?), ?) = 0")
+            params.extend([len(prefix), prefix, len(prefix) + 1, os.sep])
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+
+        sql = "SELECT * FROM media"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY started_at"
+        with self._lock:
+            return [MediaEntry(*row) for row in self._conn.execute(sql, params)]
+
+    def get(self, path):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM media WHERE path = ?", (str(Path(path).resolve()),)
+            ).fetchone()
+        return MediaEntry(*row) if row is not None else None
+
+    def cameras(self):
+        """(mac, tag) de las cámaras con media indexada; el tag es el más reciente."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT mac, tag FROM media m WHERE started_at = "
+                "(SELECT MAX(started_at) FROM media WHERE mac = m.mac) GROUP BY mac ORDER BY mac"
+            ).fetchall()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+from galeria import VIDEO_EXTENSIONS
+
+THUMBNAIL_MAX_SIDE = 720
+THUMBNAIL_JPEG_QUALITY = 85
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_CACHE_DIR = Path(__file__).with_name(".miniaturas")
+DISK_CACHE_MAX_BYTES = 256 * 1024 ** 2
+MEMORY_CACHE_ITEMS = 64
+
+
+def cache_key(path, stat):
+    """Clave de la miniatura: cambia si el fichero se reescribe (mtime) o crece (tamaño)."""
+    raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(path, max_side=THUMBNAIL_MAX_SIDE):
+    """Primer frame (vídeo) o imagen reducida a `max_side` como mucho; None si no se puede leer."""
+    if Path(path).suffix.lower() in VIDEO_EXTENSIONS:
+        cap = cv2.VideoCapture(str(path))
+        ok, frame = cap.read()
+        cap.release()
+        if not ok:
+            frame = None
+    else:
+        # El decodificador JPEG reduce a la mitad sin decodificar la imagen completa
+        frame = cv2.imread(str(path), cv2.IMREAD_REDUCED_COLOR_2)
+        if frame is not None and max(frame.shape[:2]) < max_side:
+            frame = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if frame is None or frame.size == 0:
+        return None
+
+    h, w = frame.shape[:2]
+    scale = max_side / max(h, w)
+    if scale < 1:
+        frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def _to_qimage(frame):
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format.Format_RGB888)
+    return image.copy()
+
+
+class ThumbnailDiskCache:
+    """Miniaturas JPEG en disco con expulsión LRU por tamaño total.
+
+    El orden de uso es el mtime de cada fichero, que se actualiza en cada acierto.
+    """
+
+    def __init__(self, directory=THUMBNAIL_CACHE_DIR, max_bytes=DISK_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._total_bytes = 0
+
+    def _load_entries(self):
+        if self._entries is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._entries = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".jpg"):
+                    stat = entry.stat()
+                    self._entries[entry.name] = [stat.st_mtime, stat.st_size]
+        self._total_bytes = sum(size for _mtime, size in self._entries.values())
+
+    def get(self, key):
+        name = f"{key}.jpg"
+        with self._lock:
+            self._load_entries()
+            if name not in self._entries:
+                return None
+            now = time.time()
+            self._entries[name][0] = now
+        try:
+            data = (self.directory / name).read_bytes()
+            os.utime(self.directory / name, (now, now))
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(name)
+            return None
+        return data
+
+    def put(self, key, data):
+        name = f"{key}.jpg"
+        target = self.directory / name
+        with self._lock:
+            self._load_entries()
+            tmp = target.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+            self._forget(name)
+            self._entries[name] = [time.time(), len(data)]
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _forget(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for name, _entry in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            (self.directory / name).unlink(missing_ok=True)
+            self._forget(name)
+
+    def stats(self):
+        with self._lock:
+            self._load_entries()
+            return {"files": len(self._entries), "bytes": self._total_bytes}
+
+
+class ThumbnailCache(QObject):
+    """Vistas previas para la galería: memoria (QPixmap) → disco (JPEG) → generación en el pool.
+
+    `request()` devuelve el pixmap si ya está en memoria; si no, lo prepara en
+    segundo plano y lo anuncia con `ready(ruta, pixmap)`, nulo si no se pudo leer.
+    """
+
+    ready = pyqtSignal(str, QPixmap)
+    _generated = pyqtSignal(str, str, object)
+
+    def __init__(self, disk_cache=None, max_items=MEMORY_CACHE_ITEMS, max_workers=THUMBNAIL_WORKERS, parent=None):
+        super().__init__(parent)
+        self.disk_cache = disk_cache or ThumbnailDiskCache()
+        self.max_items = max_items
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Thumbnail")
+        self._memory = OrderedDict()
+        self._pending = set()
+        self._generated.connect(self._store)
+
+    def request(self, path):
+        path = str(path)
+        try:
+            key = cache_key(path, os.stat(path))
+        except FileNotFoundError:
+            return QPixmap()
+
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            return pixmap
+        if key not in self._pending:
+            self._pending.add(key)
+            self._pool.submit(self._generate, path, key)
+        return None
+
+    def _generate(self, path, key):
+        image = None
+        data = self.disk_cache.get(key)
+        if data is not None:
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            frame = make_thumbnail(path)
+            if frame is not None:
+                ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_JPEG_QUALITY])
+                if ok:
+                    self.disk_cache.put(key, encoded.tobytes())
+        if frame is not None:
+            # QImage se puede crear fuera del hilo de Qt; QPixmap no
+            image = _to_qimage(frame)
+        try:
+            self._generated.emit(path, key, image)
+        except RuntimeError:
+            pass
+
+    def _store(self, path, key, image):
+        self._pending.discard(key)
+        if image is None:
+            self.ready.emit(path, QPixmap())
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._memory[key] = pixmap
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+        self.ready.emit(path, pixmap)
+
+
+thumbnail_cache = ThumbnailCache()
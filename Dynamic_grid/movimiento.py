@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from estadisticas import smooth
+
+ANALYSIS_WIDTH = 160
+ANALYSIS_INTERVAL = 0.2
+PIXEL_THRESHOLD = 25
+MIN_AREA_RATIO = 0.01
+LEARNING_RATE = 0.05
+POST_ROLL_SECONDS = 10.0
+MAX_EVENTS = 200
+
+logger = logging.getLogger(__name__)
+
+
+class MotionEvent(NamedTuple):
+    mac: str
+    started_at: float
+    ended_at: float
+    peak_ratio: float
+
+
+# ---------------- DETECTOR ----------------
+class MotionDetector:
+    """Diferencia contra un fondo promediado sobre una copia pequeña en grises.
+
+    Todo el trabajo por frame son operaciones vectorizadas de OpenCV sobre una
+    imagen de `width` píxeles de ancho, así que el coste no depende de la resolución.
+    """
+
+    def __init__(
+        self,
+        width=ANALYSIS_WIDTH,
+        pixel_threshold=PIXEL_THRESHOLD,
+        min_area_ratio=MIN_AREA_RATIO,
+        learning_rate=LEARNING_RATE,
+    ):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area_ratio = min_area_ratio
+        self.learning_rate = learning_rate
+        self._background = None
+
+    def reset(self):
+        self._background = None
+
+    def changed_ratio(self, frame):
+        """Fracción de píxeles que cambiaron respecto al fondo (0.0 - 1.0)."""
+        # Submuestreo por stride (vista sin copia) antes del resize: es lo que más pesa en 1080p
+        step = max(1, frame.shape[1] // (self.width * 2))
+        frame = frame[::step, ::step]
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            return 0.0
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def detect(self, frame):
+        ratio = self.changed_ratio(frame)
+        return ratio >= self.min_area_ratio, ratio
+
+
+# ---------------- MONITOR POR CÁMARA ----------------
+class MotionMonitor:
+    """Analiza los frames de un CameraFeed a ritmo reducido y graba mientras haya movimiento.
+
+    El pre-roll lo aporta el PreEventBuffer del feed; el post-roll mantiene la
+    grabación `post_roll` segundos después del último movimiento. Las grabaciones
+    manuales no se tocan.
+    """
+
+    def __init__(self, feed, detector=None, interval=ANALYSIS_INTERVAL, post_roll=POST_ROLL_SECONDS):
+        self.feed = feed
+        self.detector = detector or MotionDetector()
+        self.interval = interval
+        self.post_roll = post_roll
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.analysis_ms = 0.0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_seq = None
+        self._event_started_at = None
+        self._last_motion_at = 0.0
+        self._peak_ratio = 0.0
+        self._recording_started = False
+
+    @property
+    def active(self):
+        return self._event_started_at is not None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Motion-{self.feed.mac}")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.feed.request_frame()
+            latest = self.feed.frame_slot.latest()
+            if latest is None or latest.seq == self._last_seq:
+                # Sin frames nuevos (cámara caída) el post-roll sigue corriendo
+                if self.active:
+                    self._update(False, 0.0, time.time())
+                continue
+            self._last_seq = latest.seq
+
+            started_at = time.perf_counter()
+            moving, ratio = self.detector.detect(latest.image)
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            self.analysis_ms = smooth(self.analysis_ms, elapsed_ms)
+            self._update(moving, ratio, latest.timestamp)
+
+        if self.active:
+            self._finish_event(time.time())
+
+    def _update(self, moving, ratio, timestamp):
+        if moving:
+            self._last_motion_at = timestamp
+            self._peak_ratio = max(self._peak_ratio, ratio)
+            if not self.active:
+                self._event_started_at = timestamp
+                logger.info("Movimiento en %s (%s): %.1f%% de la imagen", self.feed.mac, self.feed.tag, ratio * 100)
+                if not self.feed.recording:
+                    self._recording_started = self.feed.start_recording(trigger="motion")
+        elif self.active and timestamp - self._last_motion_at > self.post_roll:
+            self._finish_event(timestamp)
+
+    def _finish_event(self, timestamp):
+        if self._recording_started and self.feed.recording:
+            self.feed.stop_recording()
+        event = MotionEvent(self.feed.mac, self._event_started_at, timestamp, self._peak_ratio)
+        self.events.append(event)
+        logger.info(
+            "Fin de movimiento en %s (%s): %.1f s, pico %.1f%%",
+            self.feed.mac,
+            self.feed.tag,
+            event.ended_at - event.started_at,
+            event.peak_ratio * 100,
+        )
+        self._event_started_at = None
+        self._peak_ratio = 0.0
+        self._recording_started = False
+
+
+# ---------------- BENCHMARK ----------------
+def benchmark(frames=300, resolution=(1920, 1080), width=ANALYSIS_WIDTH):
+    """Mide el coste medio por frame del detector con frames sintéticos en movimiento."""
+    w, h = resolution
+    detector = MotionDetector(width=width)
+    base = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+    samples = []
+    for i in range(frames):
+        frame = np.roll(base, i * 4, axis=1)
+        started_at = time.perf_counter()
+        detector.detect(frame)
+        samples.append((time.perf_counter() - started_at) * 1000)
+    samples.sort()
+    return {
+        "frames": frames,
+        "resolution": resolution,
+        "mean_ms": sum(samples) / len(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+if __name__ == "__main__":
+    for resolution in [(640, 360), (1920, 1080), (2560, 1440)]:
+        result = benchmark(resolution=resolution)
+        print(
+            f"{resolution[0]}x{resolution[1]}: {result['mean_ms']:.2f} ms/frame de media, "
+            f"p95 {result['p95_ms']:.2f} ms ({1 / ANALYSIS_INTERVAL:.0f} análisis/s por cámara)"
+        )
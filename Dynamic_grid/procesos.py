@@ -0,0 +1,239 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+RING_SLOTS = 3
+GRAB_TIMEOUT = 5.0
+OPEN_TIMEOUT = 30.0
+
+# Lo que lanza la pipe cuando el proceso hijo ha muerto (p. ej. un fallo de FFmpeg dentro de él)
+PIPE_ERRORS = (EOFError, BrokenPipeError, ConnectionResetError, OSError)
+
+
+# ---------------- PROCESO DE CAPTURA ----------------
+# Cada proceso de captura importa este módulo y main.py (ligero): aquí no debe entrar
+# nada de Qt ni de funciones.py, solo numpy/multiprocessing y cv2 dentro del hijo.
+def _capture_worker(conn, ring_slots):
+    """Bucle del proceso hijo: abre el stream, hace grab() continuo y decodifica a petición.
+
+    Los frames decodificados se escriben en un anillo de memoria compartida; por la
+    pipe solo viajan comandos y avisos pequeños, nunca los píxeles.
+    """
+    import cv2
+
+    cap = None
+    shm = None
+    shape = None
+    seq = 0
+
+    def release_ring():
+        nonlocal shm, shape
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        shm = None
+        shape = None
+
+    try:
+        while True:
+            # Sin stream abierto se espera bloqueado al siguiente comando
+            if cap is None or conn.poll():
+                command, *args = conn.recv()
+                if command == "open":
+                    cap = cv2.VideoCapture(args[0], cv2.CAP_FFMPEG)
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                    if not cap.isOpened():
+                        cap.release()
+                        cap = None
+                    conn.send(("opened", cap is not None))
+                elif command == "close":
+                    if cap is not None:
+                        cap.release()
+                        cap = None
+                elif command == "retrieve":
+                    ok, frame = cap.retrieve() if cap is not None else (False, None)
+                    if not ok or frame is None or frame.size == 0:
+                        conn.send(("frame", None))
+                        continue
+                    if frame.shape != shape:
+                        release_ring()
+                        shape = frame.shape
+                        shm = shared_memory.SharedMemory(create=True, size=frame.nbytes * ring_slots)
+                        conn.send(("ring", shm.name, shape))
+                    seq += 1
+                    slot = seq % ring_slots
+                    ring = np.ndarray((ring_slots, *shape), dtype=np.uint8, buffer=shm.buf)
+                    ring[slot] = frame
+                    del ring
+                    conn.send(("frame", slot))
+                elif command == "stop":
+                    break
+                continue
+
+            if cap.grab():
+                conn.send(("grabbed",))
+            else:
+                cap.release()
+                cap = None
+                conn.send(("eof",))
+    except (EOFError, BrokenPipeError):
+        # El proceso de la GUI se cerró
+        pass
+    finally:
+        if cap is not None:
+            cap.release()
+        release_ring()
+
+
+class CaptureProcess:
+    """Proceso de captura dedicado a una cámara, controlado por una pipe."""
+
+    def __init__(self, name, ring_slots=RING_SLOTS):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self.ring_slots = ring_slots
+        self._process = ctx.Process(
+            target=_capture_worker,
+            args=(child_conn, ring_slots),
+            name=name,
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        self._shm = None
+        self._ring = None
+        self._pending_grabs = 0
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def open(self, url):
+        """RemoteCapture sobre `url`; cerrada si el stream no abre o el proceso hijo ya no responde."""
+        self._pending_grabs = 0
+        opened = False
+        try:
+            self._conn.send(("open", url))
+            deadline = time.monotonic() + OPEN_TIMEOUT
+            # Se descartan avisos atrasados del stream anterior hasta la respuesta de "open"
+            while self._conn.poll(max(0.0, deadline - time.monotonic())):
+                message = self._conn.recv()
+                if message[0] == "opened":
+                    opened = message[1]
+                    break
+        except PIPE_ERRORS:
+            opened = False
+        return RemoteCapture(self, opened)
+
+    def close_stream(self):
+        try:
+            self._conn.send(("close",))
+        except PIPE_ERRORS:
+            pass
+
+    def wait_grab(self):
+        """Consume los avisos de grab pendientes; False si el stream se cortó o no llega nada."""
+        if self._pending_grabs:
+            self._pending_grabs = 0
+            return True
+        try:
+            if not self._conn.poll(GRAB_TIMEOUT):
+                return False
+            grabbed = False
+            while self._conn.poll():
+                message = self._conn.recv()
+                if message[0] == "eof":
+                    return False
+                grabbed = grabbed or message[0] == "grabbed"
+        except PIPE_ERRORS:
+            return False
+        return grabbed
+
+    def retrieve(self):
+        try:
+            return self._retrieve()
+        except PIPE_ERRORS:
+            return False, None
+
+    def _retrieve(self):
+        self._conn.send(("retrieve",))
+        while True:
+            if not self._conn.poll(GRAB_TIMEOUT):
+                return False, None
+            message = self._conn.recv()
+            if message[0] == "grabbed":
+                self._pending_grabs += 1
+            elif message[0] == "eof":
+                return False, None
+            elif message[0] == "ring":
+                self._attach_ring(message[1], message[2])
+            elif message[0] == "frame":
+                if message[1] is None:
+                    return False, None
+                # Una única copia desde la memoria compartida al frame que se publica
+                return True, self._ring[message[1]].copy()
+
+    def _attach_ring(self, name, shape):
+        self._detach_ring()
+        # El proceso hijo comparte el resource tracker de la GUI y es quien hace unlink
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._ring = np.ndarray((self.ring_slots, *shape), dtype=np.uint8, buffer=self._shm.buf)
+
+    def _detach_ring(self):
+        self._ring = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def stop(self):
+        try:
+            self._conn.send(("stop",))
+        except PIPE_ERRORS:
+            pass
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=2)
+        if self._shm is not None and self._process.exitcode != 0:
+            # El hijo murió sin liberar su anillo: lo libera la GUI
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._detach_ring()
+        self._conn.close()
+
+
+class RemoteCapture:
+    """Imita la parte de cv2.VideoCapture que usa CameraFeed, pero sobre un CaptureProcess."""
+
+    def __init__(self, process, opened):
+        self._process = process
+        self._opened = opened
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, _prop, _value):
+        # El buffer se configura en el proceso hijo
+        return False
+
+    def grab(self):
+        if not self._opened:
+            return False
+        self._opened = self._process.wait_grab()
+        return self._opened
+
+    def retrieve(self):
+        if not self._opened:
+            return False, None
+        ok, frame = self._process.retrieve()
+        self._opened = ok
+        return ok, frame
+
+    def release(self):
+        if self._opened:
+            self._process.close_stream()
+        self._opened = False
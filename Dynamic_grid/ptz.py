@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from estadisticas import smooth
+
+MOVE_METHODS = ("moveMotor", "move_motor", "move")
+ZOOM_IN_METHODS = ("zoomIn", "zoom_in")
+ZOOM_OUT_METHODS = ("zoomOut", "zoom_out")
+
+KIND_MOVE = "move"
+KIND_ZOOM = "zoom"
+# Peso de la última medida en la media móvil de latencias
+LATENCY_SMOOTHING = 0.2
+
+_STOP = object()
+_RESET = object()
+
+
+class PtzCommand(NamedTuple):
+    kind: str
+    method_names: tuple
+    args: tuple
+    # on_done(ok, error) de cada petición agrupada en el comando; se llaman desde el hilo de la sesión
+    callbacks: tuple
+    # Cuándo se encoló la petición más antigua del comando
+    queued_at: float
+
+
+class PtzSession:
+    """Sesión PTZ de una cámara: un cliente autenticado que se reutiliza y un único hilo.
+
+    `client_factory()` crea y autentica el cliente (p. ej. pytapo.Tapo); solo se
+    vuelve a llamar si un comando falla, y entonces el comando se reintenta una
+    vez con el cliente nuevo. El método que responde a cada acción se resuelve
+    una vez y queda cacheado.
+
+    Los comandos se ejecutan en el orden en que llegan. Mientras esperan, los
+    movimientos relativos seguidos se suman en un solo moveMotor y un zoom
+    sustituye al zoom que quedase pendiente justo antes.
+    """
+
+    def __init__(self, client_factory, name="PTZ"):
+        self.client_factory = client_factory
+        self.name = name
+        self._client = None
+        self._methods = {}
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.executed = 0
+        self.merged_moves = 0
+        self.dropped_zooms = 0
+        # Desde que se encola hasta que la cámara responde, y solo la llamada a la cámara (medias móviles, ms)
+        self.latency_ms = None
+        self.round_trip_ms = None
+
+    def move(self, x_axis, y_axis, on_done=None):
+        self.submit(KIND_MOVE, MOVE_METHODS, (x_axis, y_axis), on_done)
+
+    def zoom(self, zoom_in, on_done=None):
+        self.submit(KIND_ZOOM, ZOOM_IN_METHODS if zoom_in else ZOOM_OUT_METHODS, (), on_done)
+
+    def submit(self, kind, method_names, args=(), on_done=None):
+        callbacks = (on_done,) if on_done is not None else ()
+        command = PtzCommand(kind, tuple(method_names), tuple(args), callbacks, time.monotonic())
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+            tail = self._pending[-1] if self._pending else None
+            if isinstance(tail, PtzCommand) and tail.kind == command.kind == KIND_MOVE:
+                self._pending[-1] = tail._replace(
+                    args=(tail.args[0] + command.args[0], tail.args[1] + command.args[1]),
+                    callbacks=tail.callbacks + callbacks,
+                )
+                self.merged_moves += 1
+            elif isinstance(tail, PtzCommand) and tail.kind == command.kind == KIND_ZOOM:
+                # Manda el último zoom; quien pidió el anterior recibe el resultado de este
+                self._pending[-1] = command._replace(
+                    callbacks=tail.callbacks + callbacks, queued_at=tail.queued_at
+                )
+                self.dropped_zooms += 1
+            else:
+                self._pending.append(command)
+            self._cond.notify()
+
+    def discard_moves(self):
+        """Quita de la cola los movimientos pendientes (el que está en curso termina); devuelve cuántos."""
+        with self._cond:
+            kept = [
+                command
+                for command in self._pending
+                if not (isinstance(command, PtzCommand) and command.kind == KIND_MOVE)
+            ]
+            dropped = len(self._pending) - len(kept)
+            self._pending = deque(kept)
+        return dropped
+
+    def queue_depth(self):
+        """Comandos a la espera, sin contar el que se esté ejecutando."""
+        with self._cond:
+            return sum(1 for command in self._pending if isinstance(command, PtzCommand))
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "executed": self.executed,
+            "merged_moves": self.merged_moves,
+            "dropped_zooms": self.dropped_zooms,
+            "latency_ms": self.latency_ms,
+            "round_trip_ms": self.round_trip_ms,
+        }
+
+    def reset(self):
+        """Descarta el cliente (cambio de IP o credenciales); el siguiente comando vuelve a autenticar."""
+        self._put(_RESET)
+
+    def close(self):
+        # No se espera al hilo: un login colgado no debe bloquear el cierre de la cámara
+        with self._cond:
+            running = self._thread is not None
+            self._thread = None
+        if running:
+            self._put(_STOP)
+
+    def _put(self, item):
+        with self._cond:
+            self._pending.append(item)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                command = self._pending.popleft()
+            if command is _STOP:
+                break
+            if command is _RESET:
+                self._client = None
+                continue
+            self._execute(command)
+
+    def _execute(self, command):
+        error = None
+        started_at = time.monotonic()
+        try:
+            self._call(command)
+        except AttributeError as exc:
+            # El cliente no tiene ese método: reautenticar no lo arregla
+            error = exc
+        except Exception:
+            # Sesión caducada, cámara reiniciada o IP nueva: se autentica de nuevo y se reintenta una vez
+            self._client = None
+            started_at = time.monotonic()
+            try:
+                self._call(command)
+            except Exception as exc:
+                self._client = None
+                error = exc
+
+        finished_at = time.monotonic()
+        self.executed += 1
+        self.round_trip_ms = smooth(self.round_trip_ms, (finished_at - started_at) * 1000, LATENCY_SMOOTHING)
+        self.latency_ms = smooth(self.latency_ms, (finished_at - command.queued_at) * 1000, LATENCY_SMOOTHING)
+        for on_done in command.callbacks:
+            try:
+                on_done(error is None, error)
+            except RuntimeError:
+                # La ventana que pidió el comando ya se cerró
+                pass
+
+    def _call(self, command):
+        if self._client is None:
+            self._client = self.client_factory()
+        method = getattr(self._client, self._resolve(command.method_names))
+        return method(*command.args)
+
+    def _resolve(self, method_names):
+        name = self._methods.get(method_names)
+        if name is None:
+            name = next((n for n in method_names if callable(getattr(self._client, n, None))), None)
+            if name is None:
+                raise AttributeError(f"Ningún método disponible entre: {', '.join(method_names)}")
+            self._methods[method_names] = name
+        return name
@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import cv2
+from PyQt6.QtCore import QObject, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+from estadisticas import smooth
+
+RENDER_WORKERS = 4
+
+BASE_REFRESH_MS = 40
+# (área mínima del label en píxeles, intervalo en ms); los tiles pequeños se refrescan menos
+TILE_REFRESH_TIERS = [
+    (640 * 360, 66),
+    (320 * 180, 100),
+    (0, 200),
+]
+RATE_WINDOW_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedFrame(NamedTuple):
+    image: QImage
+    seq: int
+    timestamp: float
+    size: QSize
+
+
+def render_frame(image, size: QSize) -> QImage:
+    """Reduce el frame al tamaño del label (manteniendo aspecto) y lo pasa a RGB."""
+    h, w = image.shape[:2]
+    scale = min(size.width() / w, size.height() / h)
+    target = (max(1, int(w * scale)), max(1, int(h * scale)))
+    if target != (w, h):
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(image, target, interpolation=interpolation)
+
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    qimage = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format.Format_RGB888)
+    # copy() desacopla la QImage del buffer de NumPy, que se libera al salir
+    return qimage.copy()
+
+
+class RenderPipeline:
+    """Pool compartido que prepara las QImage de los tiles fuera del hilo de Qt.
+
+    También acumula el tiempo que cada tile pasa en el hilo principal al pintar.
+    """
+
+    def __init__(self, max_workers=RENDER_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Render")
+        self._stats_lock = threading.Lock()
+        self._main_thread_ms = {}
+
+    def submit(self, latest, size: QSize, on_ready):
+        """Encola el render de `latest`; `on_ready` recibe un RenderedFrame (o None si falla) desde el worker."""
+
+        def job():
+            rendered = None
+            try:
+                rendered = RenderedFrame(
+                    render_frame(latest.image, size), latest.seq, latest.timestamp, QSize(size)
+                )
+            except cv2.error:
+                pass
+            except Exception:
+                logger.exception("No se pudo renderizar el frame %s", latest.seq)
+            finally:
+                # Siempre se avisa, con None si falló: el label tiene un render en vuelo esperando
+                try:
+                    on_ready(rendered)
+                except RuntimeError:
+                    # El widget se destruyó mientras el frame estaba en el pool
+                    pass
+
+        self._pool.submit(job)
+
+    def record_paint(self, key, started_at):
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        with self._stats_lock:
+            self._main_thread_ms[key] = smooth(self._main_thread_ms.get(key), elapsed_ms)
+
+    def forget(self, key):
+        with self._stats_lock:
+            self._main_thread_ms.pop(key, None)
+
+    def report(self) -> dict:
+        """Milisegundos medios en el hilo de Qt por frame pintado, por tile."""
+        with self._stats_lock:
+            return dict(self._main_thread_ms)
+
+
+render_pipeline = RenderPipeline()
+
+
+class LabelRenderer(QObject):
+    """Pinta en un QLabel los frames de un FrameSlot usando el pipeline compartido.
+
+    Mantiene como mucho un render en vuelo por label y descarta los resultados cuyo
+    tamaño ya no coincide con el del label (se redimensionó mientras tanto).
+    """
+
+    rendered = pyqtSignal(object)
+
+    def __init__(self, label, key, pipeline=render_pipeline, parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.key = key
+        self.pipeline = pipeline
+        self._in_flight = False
+        self._painted_seq = None
+        self._painted_size = None
+        # Tiempo desde que se capturó el frame hasta que se pinta (media móvil)
+        self.latency_ms = None
+        self.rendered.connect(self._paint)
+
+    def update(self, latest):
+        if latest is None or self._in_flight:
+            return
+        size = self.label.size()
+        if latest.seq == self._painted_seq and size == self._painted_size:
+            return
+        self._in_flight = True
+        self.pipeline.submit(latest, size, self.rendered.emit)
+
+    def _paint(self, rendered):
+        self._in_flight = False
+        if rendered is None or rendered.size != self.label.size():
+            return
+        started_at = time.perf_counter()
+        self.label.setPixmap(QPixmap.fromImage(rendered.image))
+        self.pipeline.record_paint(self.key, started_at)
+        self._painted_seq = rendered.seq
+        self._painted_size = rendered.size
+
+        self.latency_ms = smooth(self.latency_ms, (time.time() - rendered.timestamp) * 1000)
+
+    def close(self):
+        self.pipeline.forget(self.key)
+
+
+# ---------------- PLANIFICADOR DE REFRESCO ----------------
+class _RefreshState:
+    def __init__(self, key):
+        self.key = key
+        self.interval_ms = None
+        self.last_tick = 0.0
+        self.ticks = deque()
+
+
+class RefreshScheduler(QObject):
+    """Un único QTimer que decide a qué ritmo se refresca cada widget de vídeo.
+
+    Los widgets ocultos (otra pestaña, ventana minimizada o cerrada) se pausan, los
+    tiles pequeños bajan de FPS y solo la cámara enfocada va a ritmo completo.
+    """
+
+    def __init__(self, base_interval_ms=BASE_REFRESH_MS, parent=None):
+        super().__init__(parent)
+        self.base_interval_ms = base_interval_ms
+        self._targets = {}
+        self._timer = None
+
+    def register(self, widget, key):
+        self._targets[widget] = _RefreshState(key)
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self._tick)
+            self._timer.start(self.base_interval_ms)
+
+    def unregister(self, widget):
+        self._targets.pop(widget, None)
+
+    def interval_for(self, widget):
+        """Intervalo en ms para `widget`, o None si no hace falta pintarlo."""
+        if not widget.isVisible() or widget.window().isMinimized() or widget.visibleRegion().isEmpty():
+            return None
+        if (widget.isWindow() and widget.isActiveWindow()) or widget.underMouse():
+            return self.base_interval_ms
+        area = widget.label.width() * widget.label.height()
+        for min_area, interval_ms in TILE_REFRESH_TIERS:
+            if area >= min_area:
+                return interval_ms
+        return TILE_REFRESH_TIERS[-1][1]
+
+    def _tick(self):
+        now = time.monotonic()
+        tolerance = self.base_interval_ms / 2000
+        for widget, state in list(self._targets.items()):
+            try:
+                state.interval_ms = self.interval_for(widget)
+                if state.interval_ms is None or now - state.last_tick < state.interval_ms / 1000 - tolerance:
+                    continue
+                state.last_tick = now
+                state.ticks.append(now)
+                widget.update_frame()
+            except RuntimeError:
+                # El widget de Qt ya fue destruido
+                self._targets.pop(widget, None)
+
+    def _rate(self, state):
+        cutoff = time.monotonic() - RATE_WINDOW_SECONDS
+        while state.ticks and state.ticks[0] < cutoff:
+            state.ticks.popleft()
+        return len(state.ticks) / RATE_WINDOW_SECONDS
+
+    def rate_for(self, widget) -> float:
+        state = self._targets.get(widget)
+        return self._rate(state) if state is not None else 0.0
+
+    def report(self) -> dict:
+        """FPS efectivos de refresco por widget en la última ventana de medida."""
+        return {state.key: self._rate(state) for state in self._targets.values()}
+
+
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos de la aplicación se importan por nombre, como hace main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from descubrimiento import (
+    IpCache,
+    NeighborBackend,
+    PingArpBackend,
+    ProcNetArpBackend,
+    SubnetSweeper,
+    buscar_ip,
+    normalizar_mac,
+    parsear_ip_neigh,
+    parsear_proc_net_arp,
+    parsear_tabla_arp,
+    ping_args,
+)
+
+FIXTURES = Path(__file__).with_name("fixtures")
+
+CAMARA = "3c-84-6a-aa-bb-cc"
+ROUTER = "a4-2b-b0-11-22-33"
+OTRA_RED = "00-1a-2b-3c-4d-5e"
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class FakeBackend(NeighborBackend):
+    """Tabla de vecinos en memoria: `probe` la llena con `on_probe` y cuenta los barridos."""
+
+    def __init__(self, table=None, on_probe=None, probe_delay=0.0):
+        self.table = dict(table or {})
+        self.on_probe = dict(on_probe or {})
+        self.probe_delay = probe_delay
+        self.probes = 0
+
+    def probe(self, ips):
+        self.probes += 1
+        time.sleep(self.probe_delay)
+        self.table.update(self.on_probe)
+
+    def read_table(self):
+        return dict(self.table)
+
+
+# ---------------- PARSERS ----------------
+@pytest.mark.parametrize(
+    "mac, expected",
+    [
+        ("3C:84:6A:AA:BB:CC", CAMARA),
+        ("3c-84-6a-aa-bb-cc", CAMARA),
+        (" 3c:84:6a:aa:bb:cc\n", CAMARA),
+        ("0:1a:2b:3c:4d:5e", OTRA_RED),
+        ("3c:84:6a:a:b:c", "3c-84-6a-0a-0b-0c"),
+    ],
+)
+def test_normalizar_mac(mac, expected):
+    assert normalizar_mac(mac) == expected
+
+
+def test_parsear_tabla_arp_windows():
+    tabla = parsear_tabla_arp(fixture("arp_windows.txt"))
+    assert tabla[CAMARA] == "192.168.60.23"
+    assert tabla[ROUTER] == "192.168.60.1"
+    assert tabla[OTRA_RED] == "10.0.0.1"
+    # Las cabeceras "Interfaz: ..." tienen IP pero no MAC
+    assert "192.168.60.10" not in tabla.values()
+
+
+def test_parsear_tabla_arp_linux():
+    tabla = parsear_tabla_arp(fixture("arp_linux.txt"))
+    assert tabla == {ROUTER: "192.168.60.1", CAMARA: "192.168.60.23", OTRA_RED: "10.0.0.1"}
+
+
+def test_parsear_tabla_arp_macos_sin_ceros_iniciales():
+    tabla = parsear_tabla_arp(fixture("arp_macos.txt"))
+    assert tabla == {
+        ROUTER: "192.168.60.1",
+        "3c-84-6a-0a-0b-0c": "192.168.60.23",
+        OTRA_RED: "10.0.0.1",
+    }
+
+
+def test_parsear_proc_net_arp_ignora_incompletas():
+    tabla = parsear_proc_net_arp(fixture("proc_net_arp.txt"))
+    assert tabla == {ROUTER: "192.168.60.1", CAMARA: "192.168.60.23", OTRA_RED: "10.0.0.1"}
+
+
+def test_parsear_ip_neigh_ignora_fallidas_e_ipv6():
+    tabla = parsear_ip_neigh(fixture("ip_neigh.txt"))
+    assert tabla == {ROUTER: "192.168.60.1", CAMARA: "192.168.60.23", OTRA_RED: "10.0.0.1"}
+
+
+@pytest.mark.parametrize(
+    "platform, flags",
+    [
+        ("win32", ["-n", "1", "-w", "400"]),
+        ("linux", ["-c", "1", "-W", "1"]),
+        ("darwin", ["-c", "1", "-W", "400"]),
+        ("freebsd14", ["-c", "1", "-W", "400"]),
+    ],
+)
+def test_ping_args_por_plataforma(platform, flags):
+    assert ping_args("192.168.60.23", 400, platform) == ["ping", *flags, "192.168.60.23"]
+
+
+# ---------------- BACKENDS ----------------
+def test_ping_arp_backend_sondea_todas_las_ips():
+    pinged = []
+    lock = threading.Lock()
+
+    def fake_ping(ip):
+        with lock:
+            pinged.append(ip)
+
+    backend = PingArpBackend(ping=fake_ping, leer_arp=lambda: fixture("arp_windows.txt"), max_workers=8)
+    ips = [f"192.168.60.{i}" for i in range(1, 255)]
+    backend.probe(ips)
+    assert sorted(pinged) == sorted(ips)
+    assert backend.read_table()[CAMARA] == "192.168.60.23"
+
+
+def test_proc_net_arp_backend_lee_el_fichero(tmp_path):
+    arp_path = tmp_path / "arp"
+    arp_path.write_text(fixture("proc_net_arp.txt"), encoding="utf-8")
+    backend = ProcNetArpBackend(arp_path=arp_path, prime=False)
+    assert backend.read_table()[CAMARA] == "192.168.60.23"
+
+
+def test_proc_net_arp_backend_sin_fichero_usa_ip_neigh(tmp_path):
+    backend = ProcNetArpBackend(
+        arp_path=tmp_path / "no_existe", leer_neigh=lambda: fixture("ip_neigh.txt"), prime=False
+    )
+    assert backend.read_table()[CAMARA] == "192.168.60.23"
+
+
+# ---------------- BARRIDO ----------------
+def test_find_usa_la_tabla_sin_barrer():
+    backend = FakeBackend(table={CAMARA: "192.168.60.23"})
+    sweeper = SubnetSweeper(backend=backend)
+    assert sweeper.find("3C:84:6A:AA:BB:CC") == "192.168.60.23"
+    assert backend.probes == 0
+
+
+def test_find_barre_si_no_esta_en_la_tabla():
+    backend = FakeBackend(on_probe={CAMARA: "192.168.60.23"})
+    sweeper = SubnetSweeper(backend=backend)
+    assert sweeper.find(CAMARA) == "192.168.60.23"
+    assert backend.probes == 1
+
+
+def test_barridos_concurrentes_comparten_resultado():
+    backend = FakeBackend(on_probe={CAMARA: "192.168.60.23"}, probe_delay=0.2)
+    sweeper = SubnetSweeper(backend=backend, reuse_seconds=0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sweeper.sweep())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.probes == 1
+    assert all(result == {CAMARA: "192.168.60.23"} for result in results)
+
+
+def test_barrido_reciente_se_reutiliza():
+    backend = FakeBackend(on_probe={CAMARA: "192.168.60.23"})
+    sweeper = SubnetSweeper(backend=backend, reuse_seconds=60)
+    sweeper.sweep()
+    sweeper.sweep()
+    assert backend.probes == 1
+
+
+def test_mac_ausente_espera_su_backoff():
+    backend = FakeBackend()
+    sweeper = SubnetSweeper(backend=backend, reuse_seconds=0, backoff_seconds=0.2, backoff_max_seconds=0.4)
+    assert sweeper.find(CAMARA) is None
+    assert sweeper.find(CAMARA) is None
+    assert backend.probes == 1
+
+    time.sleep(0.25)
+    sweeper.find(CAMARA)
+    assert backend.probes == 2
+    # El segundo fallo duplica la espera
+    time.sleep(0.25)
+    sweeper.find(CAMARA)
+    assert backend.probes == 2
+
+
+def test_backoff_no_oculta_lo_que_encuentra_otro_barrido():
+    backend = FakeBackend()
+    sweeper = SubnetSweeper(backend=backend, reuse_seconds=0, backoff_seconds=60)
+    assert sweeper.find(CAMARA) is None
+    backend.on_probe = {CAMARA: "192.168.60.23"}
+    sweeper.sweep()
+    assert sweeper.find(CAMARA) == "192.168.60.23"
+
+
+# ---------------- CACHE ----------------
+def test_buscar_ip_guarda_todo_el_barrido(tmp_path):
+    backend = FakeBackend(on_probe={CAMARA: "192.168.60.23", ROUTER: "192.168.60.1"})
+    cache = IpCache(tmp_path / "ip_cache.json")
+    assert buscar_ip(CAMARA, sweeper=SubnetSweeper(backend=backend), cache=cache) == "192.168.60.23"
+
+    reloaded = IpCache(tmp_path / "ip_cache.json")
+    assert reloaded.get(CAMARA) == "192.168.60.23"
+    assert reloaded.get(ROUTER) == "192.168.60.1"
+
+
+def test_cache_solo_reescribe_si_cambia(tmp_path):
+    path = tmp_path / "ip_cache.json"
+    cache = IpCache(path)
+    cache.store(CAMARA, "192.168.60.23")
+    path.write_text(json.dumps({"marca": {"ip": "sin tocar"}}), encoding="utf-8")
+
+    cache.store(CAMARA, "192.168.60.23")
+    assert "marca" in json.loads(path.read_text(encoding="utf-8"))
+
+    cache.store(CAMARA, "192.168.60.99")
+    assert json.loads(path.read_text(encoding="utf-8"))[CAMARA]["ip"] == "192.168.60.99"
+
+
+def test_cache_invalidate(tmp_path):
+    cache = IpCache(tmp_path / "ip_cache.json")
+    cache.store(CAMARA, "192.168.60.23")
+    cache.invalidate("3c:84:6a:aa:bb:cc")
+    assert cache.get(CAMARA) is None
+    assert IpCache(tmp_path / "ip_cache.json").get(CAMARA) is None
@@ -0,0 +1,90 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from funciones import CameraFeed
+
+CLIP_FRAMES = 3000
+
+
+class CountingCapture:
+    """Envuelve el cv2.VideoCapture real y cuenta cada grab() y retrieve()."""
+
+    def __init__(self, cap, counts):
+        self._cap = cap
+        self._counts = counts
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def grab(self):
+        self._counts["grab"] += 1
+        return self._cap.grab()
+
+    def retrieve(self):
+        self._counts["retrieve"] += 1
+        return self._cap.retrieve()
+
+    def release(self):
+        self._cap.release()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 15, (64, 48))
+    for i in range(CLIP_FRAMES):
+        writer.write(np.full((48, 64, 3), i % 256, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def feed(clip, tmp_path):
+    counts = {"grab": 0, "retrieve": 0}
+    feed = CameraFeed("aa:bb:cc:dd:ee:ff", "u", "p", settings={"media_directory": str(tmp_path)}, source=str(clip))
+    open_capture = feed._open_capture
+    feed._open_capture = lambda url: CountingCapture(open_capture(url), counts)
+    feed.counts = counts
+    feed.start()
+    yield feed
+    feed.stop()
+    feed.join(timeout=5)
+
+
+def test_grab_continuo_sin_decodificar(feed):
+    assert wait_for(lambda: feed.counts["grab"] >= 200)
+    # Nadie ha pedido un frame: se vacía el stream sin decodificar nada
+    assert feed.counts["retrieve"] == 0
+    assert feed.frame_slot.latest() is None
+    assert feed.skipped_decodes > 0
+
+
+def test_retrieve_solo_a_peticion(feed):
+    assert wait_for(lambda: feed.counts["grab"] >= 50)
+
+    seqs = []
+    for requests in range(1, 4):
+        previous = feed.frame_slot.latest()
+        feed.request_frame()
+        latest = feed.frame_slot.wait_newer(previous.seq if previous is not None else 0, 3.0)
+        assert latest is not None
+        seqs.append(latest.seq)
+        grabs = feed.counts["grab"]
+        # Los grabs siguen entre peticiones, pero sin ningún retrieve de más
+        assert wait_for(lambda: feed.counts["grab"] >= grabs + 20)
+        assert feed.counts["retrieve"] == requests
+
+    assert seqs == sorted(seqs) and len(set(seqs)) == 3
+    assert feed.decoded_frames == 3
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+from grabacion import PreEventBuffer, SegmentedRecorder
+
+
+def _wait_encoded(buffer, frames, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while buffer.stats()["frames"] < frames and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+# ---------------- BUFFER PRE-EVENTO ----------------
+def test_preroll_caduca_sin_frames_nuevos():
+    buffer = PreEventBuffer(0.3, 10 ** 8, 15)
+    frame = np.zeros((90, 160, 3), dtype=np.uint8)
+    buffer.push(frame, time.time())
+    _wait_encoded(buffer, 1)
+    assert len(buffer.snapshot()) == 1
+
+    # Nadie vuelve a hacer push (stream principal, cámara caída): aun así no se entrega metraje viejo
+    time.sleep(0.4)
+    assert buffer.snapshot() == []
+    assert buffer.stats()["seconds"] == 0.0
+
+
+def test_preroll_clear():
+    buffer = PreEventBuffer(5, 10 ** 8, 15)
+    buffer.push(np.zeros((90, 160, 3), dtype=np.uint8), time.time())
+    _wait_encoded(buffer, 1)
+    buffer.clear()
+    assert buffer.stats()["frames"] == 0
+    assert buffer.stats()["bytes"] == 0
+
+
+# ---------------- GRABACIÓN CONTINUA ----------------
+def _recorder(tmp_path, got):
+    recorder = SegmentedRecorder(
+        lambda: None, tmp_path, "c", on_segment=lambda path, _duration: got.append(path.name)
+    )
+    recorder.partial_dir.mkdir()
+    return recorder
+
+
+def test_linea_a_medias_no_se_pierde(tmp_path):
+    got = []
+    recorder = _recorder(tmp_path, got)
+    for name in ("c_1.mp4", "c_2.mp4"):
+        (recorder.partial_dir / name).touch()
+
+    # ffmpeg ha escrito la primera línea entera y la segunda solo a medias
+    recorder.list_path.write_bytes(b"c_1.mp4,0.0,300.0\nc_2.mp4,300.0,6")
+    recorder._collect_completed()
+    assert got == ["c_1.mp4"]
+
+    with open(recorder.list_path, "ab") as f:
+        f.write(b"00.0\n")
+    recorder._collect_completed()
+    assert got == ["c_1.mp4", "c_2.mp4"]
+    assert sorted(p.name for p in tmp_path.glob("c_*.mp4")) == ["c_1.mp4", "c_2.mp4"]
+
+
+def test_arranque_rescata_segmentos_terminados(tmp_path):
+    got = []
+    recorder = _recorder(tmp_path, got)
+    for name in ("c_1.mp4", "c_2.mp4", "c_3.mp4"):
+        (recorder.partial_dir / name).touch()
+    # c_3 estaba en curso cuando se cayó la aplicación: no figura en la lista
+    recorder.list_path.write_bytes(b"c_1.mp4,0.0,300.0\nc_2.mp4,300.0,600.0")
+
+    recorder.start()
+    recorder.stop()
+    assert got == ["c_1.mp4", "c_2.mp4"]
+    assert list(recorder.partial_dir.iterdir()) == []
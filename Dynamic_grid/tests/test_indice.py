@@ -0,0 +1,17 @@
+import time
+from pathlib import Path
+
+from indice import MediaIndex
+
+
+def test_query_incluye_grabacion_en_curso(tmp_path):
+    index = MediaIndex(tmp_path / "media.db")
+    now = time.time()
+    index.add(tmp_path / "en_curso.mp4", "video", "c", "manual", now - 3600)
+    index.add(tmp_path / "antigua.mp4", "video", "c", "manual", now - 7200, ended_at=now - 5400)
+    index.add(tmp_path / "foto.jpg", "photo", "c", "manual", now - 60, ended_at=now - 60)
+
+    # La grabación empezó antes de `since` y sigue abierta: se solapa con la ventana
+    names = [Path(entry.path).name for entry in index.query(since=now - 600)]
+    assert names == ["en_curso.mp4", "foto.jpg"]
+    index.close()
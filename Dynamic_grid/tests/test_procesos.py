@@ -0,0 +1,18 @@
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_proceso_de_captura_no_importa_la_gui():
+    # Lo mismo que hace multiprocessing "spawn" en cada proceso hijo: main.py como __mp_main__ y procesos
+    code = (
+        "import runpy, sys\n"
+        f"sys.path.insert(0, {str(APP_DIR)!r})\n"
+        f"runpy.run_path({str(APP_DIR / 'main.py')!r}, run_name='__mp_main__')\n"
+        "import procesos\n"
+        "print(','.join(m for m in ('PyQt6', 'funciones', 'ventana', 'galeria') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
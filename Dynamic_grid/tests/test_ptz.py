@@ -0,0 +1,241 @@
+import threading
+import time
+
+from ptz import PtzSession
+
+
+class FakeTapo:
+    """Cliente Tapo falso: registra las llamadas y puede fallar o tardar a demanda."""
+
+    def __init__(self, log, delay=0.0, fail_times=0):
+        self.log = log
+        self.delay = delay
+        self.fail_times = fail_times
+
+    def __getattribute__(self, name):
+        if name == "moveMotor":
+            object.__getattribute__(self, "log")["lookups"] += 1
+        return object.__getattribute__(self, name)
+
+    def moveMotor(self, x_axis, y_axis):
+        time.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("sesión caducada")
+        self.log["calls"].append(("move", x_axis, y_axis))
+
+    def zoomIn(self):
+        time.sleep(self.delay)
+        self.log["calls"].append(("zoom", True))
+
+    def zoomOut(self):
+        time.sleep(self.delay)
+        self.log["calls"].append(("zoom", False))
+
+
+class FakeFactory:
+    def __init__(self, **client_options):
+        self.log = {"calls": [], "lookups": 0}
+        self.logins = 0
+        self.client_options = client_options
+
+    def __call__(self):
+        self.logins += 1
+        # Solo el primer cliente hereda los fallos configurados
+        options, self.client_options = self.client_options, {}
+        return FakeTapo(self.log, **options)
+
+
+def always_failing(factory):
+    """Factoría cuyos clientes fallan todos en su primera llamada."""
+
+    def build():
+        factory.logins += 1
+        return FakeTapo(factory.log, fail_times=1)
+
+    return build
+
+
+def run_and_wait(session, submit, count=1, timeout=2.0):
+    """Lanza `submit(on_done)` y espera a que lleguen `count` resultados."""
+    results = []
+    done = threading.Event()
+
+    def on_done(ok, error):
+        results.append((ok, error))
+        if len(results) >= count:
+            done.set()
+
+    submit(on_done)
+    assert done.wait(timeout)
+    return results
+
+
+# ---------------- SESIÓN ----------------
+def test_sesion_se_reutiliza_entre_comandos():
+    factory = FakeFactory()
+    session = PtzSession(factory)
+    for _ in range(5):
+        run_and_wait(session, lambda on_done: session.move(1, 0, on_done))
+    session.close()
+
+    assert factory.logins == 1
+    assert factory.log["calls"] == [("move", 1, 0)] * 5
+
+
+def test_metodo_resuelto_queda_cacheado():
+    factory = FakeFactory()
+    session = PtzSession(factory)
+    for _ in range(3):
+        run_and_wait(session, lambda on_done: session.move(0, 1, on_done))
+    session.close()
+
+    # Una consulta para resolver (callable) y una por llamada; sin cache serían dos por llamada
+    assert factory.log["lookups"] == 1 + 3
+
+
+def test_fallo_reautentica_y_reintenta_una_vez():
+    factory = FakeFactory(fail_times=1)
+    session = PtzSession(factory)
+    results = run_and_wait(session, lambda on_done: session.move(1, 1, on_done))
+    session.close()
+
+    assert results == [(True, None)]
+    assert factory.logins == 2
+    assert factory.log["calls"] == [("move", 1, 1)]
+
+
+def test_solo_un_reintento():
+    factory = FakeFactory()
+    session = PtzSession(always_failing(factory))
+    results = run_and_wait(session, lambda on_done: session.move(1, 1, on_done))
+    session.close()
+
+    ok, error = results[0]
+    assert not ok and isinstance(error, ConnectionError)
+    assert factory.logins == 2
+
+
+def test_metodo_inexistente_no_reautentica():
+    logins = []
+
+    class SinZoom:
+        pass
+
+    session = PtzSession(lambda: logins.append(1) or SinZoom())
+    results = run_and_wait(session, lambda on_done: session.zoom(True, on_done))
+    session.close()
+
+    ok, error = results[0]
+    assert not ok and isinstance(error, AttributeError)
+    assert len(logins) == 1
+
+
+def test_latencias_se_actualizan():
+    factory = FakeFactory(delay=0.05)
+    session = PtzSession(factory)
+    assert session.latency_ms is None and session.round_trip_ms is None
+    run_and_wait(session, lambda on_done: session.move(1, 0, on_done))
+    session.close()
+
+    stats = session.stats()
+    assert stats["executed"] == 1
+    assert stats["round_trip_ms"] >= 40
+    assert stats["latency_ms"] >= stats["round_trip_ms"]
+
+
+# ---------------- COLA ----------------
+class GatedTapo:
+    """Cliente cuya primera llamada se queda esperando a `release`, para acumular cola detrás."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def _call(self, entry):
+        if not self.calls:
+            self.started.set()
+            assert self.release.wait(2)
+        self.calls.append(entry)
+
+    def moveMotor(self, x_axis, y_axis):
+        self._call(("move", x_axis, y_axis))
+
+    def zoomIn(self):
+        self._call(("zoom", True))
+
+    def zoomOut(self):
+        self._call(("zoom", False))
+
+
+def blocked_session():
+    client = GatedTapo()
+    session = PtzSession(lambda: client)
+    session.move(1, 0)
+    assert client.started.wait(2)
+    return session, client
+
+
+def drain(session, client):
+    """Libera la primera llamada y espera a que se vacíe la cola; devuelve lo que llegó a la cámara."""
+    done = threading.Event()
+    session.submit("fin", ("zoomOut",), (), lambda ok, error: done.set())
+    client.release.set()
+    assert done.wait(2)
+    session.close()
+    return client.calls[:-1]
+
+
+def test_movimientos_en_cola_se_suman():
+    session, client = blocked_session()
+    callbacks = []
+    for x_axis, y_axis in [(1, 0), (1, 0), (0, -1), (2, 3)]:
+        session.move(x_axis, y_axis, lambda ok, error: callbacks.append(ok))
+    assert session.queue_depth() == 1
+
+    assert drain(session, client) == [("move", 1, 0), ("move", 4, 2)]
+    # Cada petición agrupada recibe su resultado
+    assert callbacks == [True] * 4
+    assert session.stats()["merged_moves"] == 3
+
+
+def test_zoom_sustituye_al_pendiente():
+    session, client = blocked_session()
+    callbacks = []
+    session.zoom(True, lambda ok, error: callbacks.append("in"))
+    session.zoom(False, lambda ok, error: callbacks.append("out"))
+    assert session.queue_depth() == 1
+
+    assert drain(session, client) == [("move", 1, 0), ("zoom", False)]
+    assert callbacks == ["in", "out"]
+    assert session.stats()["dropped_zooms"] == 1
+
+
+def test_orden_se_respeta_entre_tipos():
+    session, client = blocked_session()
+    session.move(1, 0)
+    session.zoom(True)
+    session.move(0, 1)
+    session.move(0, 1)
+    assert session.queue_depth() == 3
+
+    assert drain(session, client) == [("move", 1, 0), ("move", 1, 0), ("zoom", True), ("move", 0, 2)]
+
+
+def test_discard_moves_al_soltar():
+    session, client = blocked_session()
+    session.move(1, 0)
+    session.zoom(True)
+    session.move(1, 0)
+    assert session.discard_moves() == 2
+    assert session.queue_depth() == 1
+
+    # El movimiento en curso termina; los pendientes no llegan a la cámara
+    assert drain(session, client) == [("move", 1, 0), ("zoom", True)]
+
+
+def test_discard_moves_sin_cola():
+    session = PtzSession(lambda: GatedTapo())
+    assert session.discard_moves() == 0
+    assert session.queue_depth() == 0
@@ -0,0 +1,33 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+from PyQt6.QtCore import QSize
+
+from renderizado import RenderPipeline
+
+
+def render(image, size=QSize(32, 24)):
+    pipeline = RenderPipeline(max_workers=1)
+    results = []
+    done = threading.Event()
+
+    def on_ready(rendered):
+        results.append(rendered)
+        done.set()
+
+    pipeline.submit(SimpleNamespace(image=image, seq=7, timestamp=0.0), size, on_ready)
+    assert done.wait(2)
+    return results
+
+
+def test_render_correcto():
+    [rendered] = render(np.zeros((48, 64, 3), dtype=np.uint8))
+    assert rendered.seq == 7
+    assert (rendered.image.width(), rendered.image.height()) == (32, 24)
+
+
+def test_error_inesperado_avisa_con_none():
+    # Un frame sin dimensiones hace fallar el render con algo que no es cv2.error
+    assert render(np.zeros((0, 0, 3), dtype=np.uint8)) == [None]
+    assert render(None) == [None]
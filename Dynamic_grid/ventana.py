@@ -0,0 +1,1228 @@
+import logging
+import math
+import sys
+from pathlib import Path
+
+from PyQt6.QtCore import QDateTime, QFileSystemWatcher, Qt, QTimer, QUrl, pyqtSignal
+from PyQt6.QtGui import QDesktopServices, QPixmap
+from PyQt6.QtWidgets import (
+    QApplication,
+    QCheckBox,
+    QComboBox,
+    QDateTimeEdit,
+    QDialog,
+    QDoubleSpinBox,
+    QFileDialog,
+    QFormLayout,
+    QGroupBox,
+    QGridLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QListView,
+    QMainWindow,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QSpinBox,
+    QTabWidget,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from estilos import APP_STYLE
+from funciones import (
+    CameraFeed,
+    CameraWidget,
+    load_cameras,
+    load_settings,
+    media_index,
+    save_cameras,
+    update_settings,
+)
+from fotos import capture_all
+from galeria import VIDEO_EXTENSIONS, BulkDeleteJob, MediaListModel
+from miniaturas import thumbnail_cache
+from renderizado import refresh_scheduler, render_pipeline
+
+# Errores que se listan en el resumen del borrado masivo
+DELETE_ERRORS_SHOWN = 20
+# Espera tras el último cambio en la carpeta antes de sincronizar la galería
+WATCH_DEBOUNCE_MS = 500
+
+
+class MediaPanel(QWidget):
+    def __init__(self, directory="", parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.selection_mode = False
+        # (mac o None, desde, hasta) en epoch; None muestra toda la carpeta
+        self.active_filter = None
+
+        self.path_label = QLabel("Directorio actual: -")
+        self.path_label.setWordWrap(True)
+
+        self.media_model = MediaListModel(self)
+        self.media_list = QListView()
+        # Filas de altura fija: la vista solo consulta al modelo las filas visibles
+        self.media_list.setUniformItemSizes(True)
+        self.media_list.setModel(self.media_model)
+        self.media_list.doubleClicked.connect(self.open_item)
+        self.media_list.selectionModel().currentChanged.connect(self.update_preview)
+
+        self.preview_label = QLabel("Selecciona un archivo para previsualizar")
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_label.setMinimumHeight(240)
+        self.preview_label.setObjectName("videoLabel")
+
+        self.preview_info = QLabel("")
+        self.preview_info.setWordWrap(True)
+        # Pixmap de la vista previa actual: al redimensionar se reescala sin volver a leer el fichero
+        self._preview_path = None
+        self._preview_pixmap = None
+        thumbnail_cache.ready.connect(self._on_thumbnail_ready)
+
+        # Las fotos y grabaciones nuevas aparecen solas; las ráfagas de cambios se agrupan
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._schedule_sync)
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(WATCH_DEBOUNCE_MS)
+        self._sync_timer.timeout.connect(self._sync_directory)
+
+        self.btn_refresh = QPushButton("Refrescar")
+        self.btn_refresh.clicked.connect(self.load_media)
+
+        self.btn_delete = QPushButton("Borrar")
+        self.btn_delete.clicked.connect(self.delete_selected_item)
+
+        self.selection_checkbox = QCheckBox("Modo selección")
+        self.selection_checkbox.stateChanged.connect(self.toggle_selection_mode)
+
+        self.btn_delete_all = QPushButton("Borrar Todo")
+        self.btn_delete_all.setObjectName("primaryButton")
+        self.btn_delete_all.clicked.connect(self.delete_checked_items)
+        self.btn_delete_all.hide()
+
+        self.delete_progress = QProgressBar()
+        self.delete_progress.hide()
+        self.btn_cancel_delete = QPushButton("Cancelar borrado")
+        self.btn_cancel_delete.hide()
+        self._delete_job = None
+
+        self.filter_camera = QComboBox()
+        self.filter_since = QDateTimeEdit(QDateTime.currentDateTime().addDays(-1))
+        self.filter_until = QDateTimeEdit(QDateTime.currentDateTime())
+        for edit in [self.filter_since, self.filter_until]:
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("dd/MM/yyyy HH:mm")
+
+        self.btn_filter = QPushButton("Buscar")
+        self.btn_filter.clicked.connect(self.apply_filter)
+
+        self.btn_clear_filter = QPushButton("Ver todo")
+        self.btn_clear_filter.clicked.connect(self.clear_filter)
+
+        filters = QHBoxLayout()
+        filters.addWidget(self.filter_camera)
+        filters.addWidget(QLabel("Desde:"))
+        filters.addWidget(self.filter_since)
+        filters.addWidget(QLabel("Hasta:"))
+        filters.addWidget(self.filter_until)
+        filters.addWidget(self.btn_filter)
+        filters.addWidget(self.btn_clear_filter)
+        filters.addStretch()
+
+        actions = QHBoxLayout()
+        actions.addWidget(self.btn_refresh)
+        actions.addWidget(self.btn_delete)
+        actions.addStretch()
+        actions.addWidget(self.selection_checkbox)
+        actions.addWidget(self.btn_delete_all)
+        actions.addWidget(self.delete_progress)
+        actions.addWidget(self.btn_cancel_delete)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.path_label)
+        layout.addLayout(filters)
+        layout.addLayout(actions)
+        layout.addWidget(self.media_list, stretch=1)
+        layout.addWidget(self.preview_label)
+        layout.addWidget(self.preview_info)
+
+        self.set_directory(directory)
+
+    def set_directory(self, directory):
+        self.directory = directory
+        self.load_media()
+
+    def _reload_camera_filter(self):
+        selected = self.filter_camera.currentData()
+        self.filter_camera.blockSignals(True)
+        self.filter_camera.clear()
+        self.filter_camera.addItem("Todas las cámaras", None)
+        for mac, tag in media_index.cameras():
+            self.filter_camera.addItem(f"{tag} ({mac})" if tag else mac, mac)
+        index = self.filter_camera.findData(selected)
+        self.filter_camera.setCurrentIndex(max(0, index))
+        self.filter_camera.blockSignals(False)
+
+    def apply_filter(self):
+        self.active_filter = (
+            self.filter_camera.currentData(),
+            self.filter_since.dateTime().toSecsSinceEpoch(),
+            self.filter_until.dateTime().toSecsSinceEpoch(),
+        )
+        self.load_media()
+
+    def clear_filter(self):
+        self.active_filter = None
+        self.load_media()
+
+    def _watch_directory(self, directory):
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        if directory:
+            self.watcher.addPath(directory)
+
+    def _schedule_sync(self, _path):
+        self._sync_timer.start()
+
+    def _sync_directory(self):
+        # Con una búsqueda activa el listado viene del índice, no de la carpeta
+        if self.active_filter is not None or not self.directory:
+            return
+        if not self.media_model.sync_directory(self.directory):
+            # Todavía se está cargando la carpeta: se reintenta después
+            self._sync_timer.start()
+
+    def load_media(self):
+        self.path_label.setText(f"Directorio actual: {self.directory or 'No definido'}")
+        self._reload_camera_filter()
+        self._clear_preview("Selecciona un archivo para previsualizar")
+        self.preview_info.setText("")
+
+        self._watch_directory(None)
+        if not self.directory:
+            self.media_model.show_message("Configura una ruta para visualizar archivos de media.")
+            return
+
+        base_path = Path(self.directory)
+        if not base_path.exists() or not base_path.is_dir():
+            self.media_model.show_message("La ruta no existe o no es un directorio válido.")
+            return
+        self._watch_directory(self.directory)
+
+        # Carpeta o búsqueda en el índice: ambas se cargan en segundo plano y por lotes
+        if self.active_filter is not None:
+            mac, since, until = self.active_filter
+            self.media_model.load_query(mac=mac, since=since, until=until, directory=self.directory)
+        else:
+            self.media_model.load_directory(self.directory)
+
+    def open_item(self, index):
+        media_path = index.data(Qt.ItemDataRole.UserRole)
+        if not media_path:
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(media_path))
+
+    def _clear_preview(self, message):
+        self._preview_path = None
+        self._preview_pixmap = None
+        self.preview_label.setText(message)
+        self.preview_label.setPixmap(QPixmap())
+
+    def update_preview(self, current, _previous):
+        if not current.isValid():
+            return
+
+        media_path = current.data(Qt.ItemDataRole.UserRole)
+        if not media_path:
+            self._clear_preview("Selecciona un archivo válido para previsualizar")
+            self.preview_info.setText("")
+            return
+
+        self.preview_info.setText(f"Archivo: {Path(media_path).name}")
+        self._preview_path = media_path
+        self._preview_pixmap = None
+        pixmap = thumbnail_cache.request(media_path)
+        if pixmap is None:
+            self.preview_label.setPixmap(QPixmap())
+            self.preview_label.setText("Cargando vista previa…")
+            return
+        self._show_preview(media_path, pixmap)
+
+    def _on_thumbnail_ready(self, media_path, pixmap):
+        if media_path == self._preview_path:
+            self._show_preview(media_path, pixmap)
+
+    def _show_preview(self, media_path, pixmap):
+        if pixmap.isNull():
+            is_video = Path(media_path).suffix.lower() in VIDEO_EXTENSIONS
+            self._clear_preview("No se pudo obtener preview del video" if is_video else "No se pudo cargar la imagen")
+            return
+        self._preview_pixmap = pixmap
+        self._scale_preview()
+
+    def _scale_preview(self):
+        if self._preview_pixmap is None:
+            return
+        self.preview_label.setPixmap(
+            self._preview_pixmap.scaled(
+                self.preview_label.size(),
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        )
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._scale_preview()
+
+    def delete_selected_item(self):
+        current = self.media_list.currentIndex()
+        if not current.isValid():
+            QMessageBox.information(self, "Sin selección", "Selecciona un elemento para borrar.")
+            return
+
+        media_path = current.data(Qt.ItemDataRole.UserRole)
+        if not media_path:
+            return
+
+        confirm = QMessageBox.question(
+            self,
+            "Confirmar borrado",
+            "¿Seguro que quieres borrar este archivo?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+        path = Path(media_path)
+        try:
+            path.unlink(missing_ok=False)
+        except FileNotFoundError:
+            QMessageBox.warning(self, "No encontrado", "El archivo ya no existe.")
+        except OSError as exc:
+            QMessageBox.critical(self, "Error", f"No se pudo borrar: {exc}")
+            return
+        media_index.remove([path])
+        self.media_model.remove_paths([media_path])
+
+    def toggle_selection_mode(self, state):
+        self.selection_mode = state == Qt.CheckState.Checked.value
+        self.btn_delete_all.setVisible(self.selection_mode)
+        self.media_model.set_checkable(self.selection_mode)
+
+    def delete_checked_items(self):
+        checked_paths = self.media_model.checked_paths()
+
+        if not checked_paths:
+            QMessageBox.information(self, "Sin selección", "Marca al menos un elemento para borrar.")
+            return
+
+        confirm = QMessageBox.question(
+            self,
+            "Confirmar borrado múltiple",
+            f"¿Seguro que quieres borrar {len(checked_paths)} archivo(s)?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+        job = BulkDeleteJob(checked_paths, parent=self)
+        job.progress.connect(self._on_delete_progress)
+        job.batch_deleted.connect(self.media_model.remove_paths)
+        job.finished.connect(self._on_delete_finished)
+        self.btn_cancel_delete.clicked.connect(job.cancel)
+        self._delete_job = job
+
+        self.delete_progress.setRange(0, len(checked_paths))
+        self.delete_progress.setValue(0)
+        self._set_delete_running(True)
+        job.start()
+
+    def _set_delete_running(self, running):
+        self.delete_progress.setVisible(running)
+        self.btn_cancel_delete.setVisible(running)
+        self.btn_delete_all.setEnabled(not running)
+        self.btn_delete.setEnabled(not running)
+
+    def _on_delete_progress(self, done, total):
+        self.delete_progress.setValue(done)
+        self.delete_progress.setFormat(f"{done}/{total}")
+
+    def _on_delete_finished(self, errors, cancelled):
+        self.btn_cancel_delete.clicked.disconnect(self._delete_job.cancel)
+        self._delete_job.deleteLater()
+        self._delete_job = None
+        self._set_delete_running(False)
+
+        if errors:
+            shown = errors[:DELETE_ERRORS_SHOWN]
+            if len(errors) > len(shown):
+                shown.append(f"… y {len(errors) - len(shown)} más")
+            title = "Borrado cancelado" if cancelled else "Borrado parcial"
+            QMessageBox.warning(self, title, "\n".join(shown))
+        elif cancelled:
+            QMessageBox.information(self, "Borrado cancelado", "Se detuvo el borrado; el resto de archivos sigue en la carpeta.")
+
+
+class AddCameraDialog(QDialog):
+    def __init__(self, parent=None, title="Agregar cámara", submit_text="Guardar", initial_values=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setModal(True)
+
+        initial_values = initial_values or {}
+
+        self.input_mac = QLineEdit()
+        self.input_mac.setPlaceholderText("AA:BB:CC:DD:EE:FF")
+        self.input_mac.setText(initial_values.get("mac", ""))
+
+        self.input_user = QLineEdit()
+        self.input_user.setPlaceholderText("admin")
+        self.input_user.setText(initial_values.get("usuario", ""))
+
+        self.input_password = QLineEdit()
+        self.input_password.setEchoMode(QLineEdit.EchoMode.Password)
+        self.input_password.setText(initial_values.get("password", ""))
+
+        form = QFormLayout()
+        form.addRow("MAC:", self.input_mac)
+        form.addRow("Usuario:", self.input_user)
+        form.addRow("Password:", self.input_password)
+
+        self.input_tag = QLineEdit()
+        self.input_tag.setPlaceholderText("Entrada, Bodega, Patio...")
+        self.input_tag.setText(initial_values.get("tag", ""))
+        form.addRow("Tag:", self.input_tag)
+
+        btn_cancel = QPushButton("Cancelar")
+        btn_cancel.clicked.connect(self.reject)
+        btn_ok = QPushButton(submit_text)
+        btn_ok.setObjectName("primaryButton")
+        btn_ok.clicked.connect(self.accept)
+
+        actions = QHBoxLayout()
+        actions.addStretch()
+        actions.addWidget(btn_cancel)
+        actions.addWidget(btn_ok)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addLayout(actions)
+
+    def get_values(self):
+        return (
+            self.input_mac.text().strip(),
+            self.input_user.text().strip(),
+            self.input_password.text(),
+            self.input_tag.text().strip(),
+        )
+
+
+class CameraListPanel(QWidget):
+    HEADERS = ["MAC", "IP", "Usuario RTSP", "Contraseña RTSP", "Tag", "Acciones"]
+
+    def __init__(self, parent=None, on_edit=None, on_delete=None):
+        super().__init__(parent)
+        self._widgets = []
+        self._on_edit = on_edit
+        self._on_delete = on_delete
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Buscar por tag, IP o MAC")
+        self.search_input.textChanged.connect(self._apply_filters)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSortingEnabled(True)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setMinimumSectionSize(36)
+        self.table.verticalHeader().setDefaultSectionSize(40)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.table, stretch=1)
+
+    def set_widgets(self, widgets):
+        self._widgets = widgets
+        self._reload()
+
+    def _reload(self):
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+
+        for row, widget in enumerate(self._widgets):
+            feed = widget.feed
+            self.table.insertRow(row)
+            values = [
+                feed.mac or "",
+                feed.ip or "",
+                feed.usuario_raw or "",
+                feed.password_raw or "",
+                feed.tag or "",
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                self.table.setItem(row, col, item)
+
+            actions_widget = QWidget()
+            actions_layout = QHBoxLayout(actions_widget)
+            actions_layout.setContentsMargins(0, 0, 0, 0)
+            actions_layout.setSpacing(6)
+
+            btn_edit = QPushButton("Modificar")
+            btn_edit.clicked.connect(lambda _checked=False, w=widget: self._trigger_edit(w))
+            btn_delete = QPushButton("Borrar")
+            btn_delete.clicked.connect(lambda _checked=False, w=widget: self._trigger_delete(w))
+
+            actions_layout.addWidget(btn_edit)
+            actions_layout.addWidget(btn_delete)
+            self.table.setCellWidget(row, len(self.HEADERS) - 1, actions_widget)
+
+        self.table.resizeColumnsToContents()
+        self.table.setSortingEnabled(True)
+        self._apply_filters()
+
+    def refresh_dynamic_values(self):
+        for row, widget in enumerate(self._widgets):
+            if row >= self.table.rowCount():
+                break
+            ip_item = self.table.item(row, 1)
+            if ip_item is not None:
+                ip_item.setText(widget.feed.ip or "")
+
+    def _trigger_edit(self, widget):
+        if callable(self._on_edit):
+            self._on_edit(widget)
+
+    def _trigger_delete(self, widget):
+        if callable(self._on_delete):
+            self._on_delete(widget)
+
+    def _apply_filters(self):
+        query = self.search_input.text().strip().lower()
+
+        for row in range(self.table.rowCount()):
+            mac = (self.table.item(row, 0).text() if self.table.item(row, 0) else "").lower()
+            ip = (self.table.item(row, 1).text() if self.table.item(row, 1) else "").lower()
+            tag = (self.table.item(row, 4).text() if self.table.item(row, 4) else "").lower()
+            visible = not query or query in mac or query in ip or query in tag
+            self.table.setRowHidden(row, not visible)
+
+
+class MainWindow(QMainWindow):
+    capture_all_done = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("CCTV Responsive")
+        self.resize(1200, 760)
+        self.setMinimumSize(960, 620)
+
+        central = QWidget()
+        self.setCentralWidget(central)
+
+        root_layout = QVBoxLayout(central)
+        root_layout.setContentsMargins(12, 12, 12, 12)
+        root_layout.setSpacing(10)
+
+        header_layout = QHBoxLayout()
+        self.title_label = QLabel("Panel de cámaras")
+        self.title_label.setObjectName("headerTitle")
+
+        header_layout.addWidget(self.title_label)
+        header_layout.addStretch()
+        root_layout.addLayout(header_layout)
+
+        self.grid_host = QWidget()
+        self.grid = QGridLayout(self.grid_host)
+        self.grid.setSpacing(12)
+        self.grid.setContentsMargins(2, 2, 2, 2)
+
+        self.tabs = QTabWidget()
+        root_layout.addWidget(self.tabs, stretch=1)
+
+        self._build_cameras_tab()
+        self._build_media_tab()
+        self._build_camera_list_tab()
+        self._build_settings_tab()
+
+        self.settings = load_settings()
+        self._load_settings_inputs(self.settings)
+        self._update_media_path_labels()
+        self.media_window = None
+
+        self.widgets = load_cameras(self.settings)
+        self.build_grid()
+        self.statusBar().showMessage("Sistema listo")
+
+        self.render_stats_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.render_stats_label)
+
+        self.table_refresh_timer = self.startTimer(2000)
+        self.capture_all_done.connect(self._on_capture_all_done)
+
+    def _build_cameras_tab(self):
+        cameras_tab = QWidget()
+        layout = QVBoxLayout(cameras_tab)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(10)
+
+        controls = QHBoxLayout()
+        self.counter_label = QLabel("0 cámaras")
+        self.counter_label.setObjectName("headerCounter")
+
+        self.btn_add = QPushButton("➕ Agregar cámara")
+        self.btn_add.setObjectName("primaryButton")
+        self.btn_add.clicked.connect(self.add_camera_dialog)
+
+        self.btn_capture_all = QPushButton("📸 Capturar todas")
+        self.btn_capture_all.clicked.connect(self.capture_all_cameras)
+
+        controls.addWidget(self.counter_label)
+        controls.addStretch()
+        controls.addWidget(self.btn_capture_all)
+        controls.addWidget(self.btn_add)
+
+        self.empty_label = QLabel("No hay cámaras configuradas. Usa ‘Agregar cámara’ para comenzar.")
+        self.empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.empty_label.setObjectName("emptyState")
+
+        layout.addLayout(controls)
+        layout.addWidget(self.empty_label)
+        layout.addWidget(self.grid_host, stretch=1)
+
+        self.tabs.addTab(cameras_tab, "Camaras")
+
+    def _build_settings_tab(self):
+        settings_tab = QWidget()
+        layout = QVBoxLayout(settings_tab)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(10)
+
+        info = QLabel("Estas credenciales se usan para mover y hacer zoom con pytapo.")
+        info.setWordWrap(True)
+
+        self.input_tapo_user = QLineEdit()
+        self.input_tapo_user.setPlaceholderText("usuario@email.com")
+
+        self.input_tapo_password = QLineEdit()
+        self.input_tapo_password.setEchoMode(QLineEdit.EchoMode.Password)
+
+        self.input_ptz_repeat = QSpinBox()
+        self.input_ptz_repeat.setRange(50, 2000)
+        self.input_ptz_repeat.setSingleStep(25)
+        self.input_ptz_repeat.setSuffix(" ms")
+        self.input_ptz_repeat.setToolTip(
+            "Cada cuánto se repite el movimiento al mantener pulsada una flecha; "
+            "si la cámara tarda más en responder, se espera a la cámara."
+        )
+
+        form = QFormLayout()
+        form.addRow("Usuario / email:", self.input_tapo_user)
+        form.addRow("Password:", self.input_tapo_password)
+        form.addRow("Repetición PTZ al mantener:", self.input_ptz_repeat)
+
+        self.btn_save_settings = QPushButton("Guardar configuración Tapo")
+        self.btn_save_settings.setObjectName("primaryButton")
+        self.btn_save_settings.clicked.connect(self.save_settings_from_tab)
+
+        actions = QHBoxLayout()
+        actions.addStretch()
+        actions.addWidget(self.btn_save_settings)
+
+        tapo_group = QGroupBox("Credenciales Tapo")
+        tapo_group_layout = QVBoxLayout(tapo_group)
+        tapo_group_layout.addWidget(info)
+        tapo_group_layout.addLayout(form)
+        tapo_group_layout.addLayout(actions)
+
+        self.input_media_directory = QLineEdit()
+        self.input_media_directory.setPlaceholderText("Selecciona una carpeta de fotos/videos")
+        self.btn_select_media_directory = QPushButton("Seleccionar carpeta")
+        self.btn_select_media_directory.clicked.connect(self.select_media_directory)
+
+        media_form = QFormLayout()
+        media_form.addRow("Ruta:", self.input_media_directory)
+
+        media_actions = QHBoxLayout()
+        media_actions.addWidget(self.btn_select_media_directory)
+        media_actions.addStretch()
+
+        self.btn_save_media_directory = QPushButton("Guardar ruta de media")
+        self.btn_save_media_directory.setObjectName("primaryButton")
+        self.btn_save_media_directory.clicked.connect(self.save_media_directory_from_tab)
+        media_actions.addWidget(self.btn_save_media_directory)
+
+        media_group = QGroupBox("Configuración de directorios")
+        media_group_layout = QVBoxLayout(media_group)
+        media_group_layout.addLayout(media_form)
+        media_group_layout.addLayout(media_actions)
+
+        self.input_continuous_recording = QCheckBox("Grabar continuamente todas las cámaras (requiere ffmpeg)")
+
+        self.input_segment_minutes = QSpinBox()
+        self.input_segment_minutes.setRange(1, 60)
+        self.input_segment_minutes.setSuffix(" min")
+
+        self.input_retention_days = QSpinBox()
+        self.input_retention_days.setRange(0, 365)
+        self.input_retention_days.setSpecialValueText("Sin límite")
+        self.input_retention_days.setSuffix(" días")
+
+        self.input_retention_gb = QDoubleSpinBox()
+        self.input_retention_gb.setRange(0, 100_000)
+        self.input_retention_gb.setDecimals(1)
+        self.input_retention_gb.setSpecialValueText("Sin límite")
+        self.input_retention_gb.setSuffix(" GB")
+
+        continuous_form = QFormLayout()
+        continuous_form.addRow(self.input_continuous_recording)
+        continuous_form.addRow("Duración de segmento:", self.input_segment_minutes)
+        continuous_form.addRow("Conservar por cámara:", self.input_retention_days)
+        continuous_form.addRow("Máximo por cámara:", self.input_retention_gb)
+
+        self.btn_save_continuous = QPushButton("Guardar grabación continua")
+        self.btn_save_continuous.setObjectName("primaryButton")
+        self.btn_save_continuous.clicked.connect(self.save_continuous_from_tab)
+
+        continuous_actions = QHBoxLayout()
+        continuous_actions.addStretch()
+        continuous_actions.addWidget(self.btn_save_continuous)
+
+        continuous_group = QGroupBox("Grabación continua")
+        continuous_group_layout = QVBoxLayout(continuous_group)
+        continuous_group_layout.addLayout(continuous_form)
+        continuous_group_layout.addLayout(continuous_actions)
+
+        self.input_motion_detection = QCheckBox("Grabar automáticamente al detectar movimiento")
+
+        self.input_motion_threshold = QSpinBox()
+        self.input_motion_threshold.setRange(5, 100)
+
+        self.input_motion_min_area = QDoubleSpinBox()
+        self.input_motion_min_area.setRange(0.1, 50)
+        self.input_motion_min_area.setDecimals(1)
+        self.input_motion_min_area.setSuffix(" % de la imagen")
+
+        self.input_motion_post_roll = QDoubleSpinBox()
+        self.input_motion_post_roll.setRange(1, 300)
+        self.input_motion_post_roll.setDecimals(0)
+        self.input_motion_post_roll.setSuffix(" s")
+
+        motion_form = QFormLayout()
+        motion_form.addRow(self.input_motion_detection)
+        motion_form.addRow("Sensibilidad (umbral por píxel):", self.input_motion_threshold)
+        motion_form.addRow("Área mínima:", self.input_motion_min_area)
+        motion_form.addRow("Seguir grabando tras el movimiento:", self.input_motion_post_roll)
+
+        self.btn_save_motion = QPushButton("Guardar detección de movimiento")
+        self.btn_save_motion.setObjectName("primaryButton")
+        self.btn_save_motion.clicked.connect(self.save_motion_from_tab)
+
+        motion_actions = QHBoxLayout()
+        motion_actions.addStretch()
+        motion_actions.addWidget(self.btn_save_motion)
+
+        motion_group = QGroupBox("Detección de movimiento")
+        motion_group_layout = QVBoxLayout(motion_group)
+        motion_group_layout.addLayout(motion_form)
+        motion_group_layout.addLayout(motion_actions)
+
+        layout.addWidget(tapo_group)
+        layout.addWidget(media_group)
+        layout.addWidget(continuous_group)
+        layout.addWidget(motion_group)
+        layout.addWidget(self._build_preroll_group())
+        layout.addWidget(self._build_snapshot_group())
+        layout.addStretch()
+
+        self.tabs.addTab(settings_tab, "Configuración")
+
+    def _build_preroll_group(self):
+        info = QLabel(
+            "Guarda en memoria los últimos segundos del substream para que cada grabación empiece "
+            "antes de pulsar \"Grabar\". Mientras está activo, cada cámara decodifica su imagen "
+            "aunque no se esté mostrando. En modo de grabación \"copy\" (ffmpeg sin recodificar) "
+            "no se pueden anteponer al vídeo y se guardan aparte como <vídeo>_previo.mp4."
+        )
+        info.setWordWrap(True)
+
+        self.input_preroll_seconds = QDoubleSpinBox()
+        self.input_preroll_seconds.setRange(0, 60)
+        self.input_preroll_seconds.setDecimals(0)
+        self.input_preroll_seconds.setSpecialValueText("Desactivado")
+        self.input_preroll_seconds.setSuffix(" s")
+
+        self.input_preroll_max_mb = QDoubleSpinBox()
+        self.input_preroll_max_mb.setRange(1, 1024)
+        self.input_preroll_max_mb.setDecimals(0)
+        self.input_preroll_max_mb.setSuffix(" MB")
+
+        preroll_form = QFormLayout()
+        preroll_form.addRow("Segundos previos:", self.input_preroll_seconds)
+        preroll_form.addRow("Memoria máxima por cámara:", self.input_preroll_max_mb)
+
+        self.btn_save_preroll = QPushButton("Guardar pre-evento")
+        self.btn_save_preroll.setObjectName("primaryButton")
+        self.btn_save_preroll.clicked.connect(self.save_preroll_from_tab)
+
+        preroll_actions = QHBoxLayout()
+        preroll_actions.addStretch()
+        preroll_actions.addWidget(self.btn_save_preroll)
+
+        preroll_group = QGroupBox("Pre-evento")
+        preroll_group_layout = QVBoxLayout(preroll_group)
+        preroll_group_layout.addWidget(info)
+        preroll_group_layout.addLayout(preroll_form)
+        preroll_group_layout.addLayout(preroll_actions)
+        return preroll_group
+
+    def _build_snapshot_group(self):
+        self.input_snapshot_format = QComboBox()
+        for label, value in [("JPEG", "jpg"), ("WebP", "webp"), ("PNG (sin pérdidas)", "png")]:
+            self.input_snapshot_format.addItem(label, value)
+
+        self.input_snapshot_quality = QSpinBox()
+        self.input_snapshot_quality.setRange(1, 100)
+
+        self.input_snapshot_max_width = QSpinBox()
+        self.input_snapshot_max_width.setRange(0, 7680)
+        self.input_snapshot_max_width.setSingleStep(160)
+        self.input_snapshot_max_width.setSpecialValueText("Original")
+        self.input_snapshot_max_width.setSuffix(" px")
+
+        self.input_burst_count = QSpinBox()
+        self.input_burst_count.setRange(2, 100)
+        self.input_burst_count.setSuffix(" fotos")
+
+        self.input_burst_interval = QSpinBox()
+        self.input_burst_interval.setRange(50, 10_000)
+        self.input_burst_interval.setSingleStep(50)
+        self.input_burst_interval.setSuffix(" ms")
+
+        snapshot_form = QFormLayout()
+        snapshot_form.addRow("Formato:", self.input_snapshot_format)
+        snapshot_form.addRow("Calidad:", self.input_snapshot_quality)
+        snapshot_form.addRow("Ancho máximo:", self.input_snapshot_max_width)
+        snapshot_form.addRow("Ráfaga:", self.input_burst_count)
+        snapshot_form.addRow("Intervalo de ráfaga:", self.input_burst_interval)
+
+        self.input_capture_all_mosaic = QCheckBox("\"Capturar todas\" guarda también un mosaico")
+        snapshot_form.addRow(self.input_capture_all_mosaic)
+
+        self.btn_save_snapshot = QPushButton("Guardar ajustes de fotos")
+        self.btn_save_snapshot.setObjectName("primaryButton")
+        self.btn_save_snapshot.clicked.connect(self.save_snapshot_from_tab)
+
+        snapshot_actions = QHBoxLayout()
+        snapshot_actions.addStretch()
+        snapshot_actions.addWidget(self.btn_save_snapshot)
+
+        snapshot_group = QGroupBox("Fotos")
+        snapshot_group_layout = QVBoxLayout(snapshot_group)
+        snapshot_group_layout.addLayout(snapshot_form)
+        snapshot_group_layout.addLayout(snapshot_actions)
+        return snapshot_group
+
+    def _load_settings_inputs(self, settings):
+        self.input_tapo_user.setText(settings.get("tapo_user", ""))
+        self.input_tapo_password.setText(settings.get("tapo_password", ""))
+        self.input_ptz_repeat.setValue(settings.get("ptz_repeat_ms", 150))
+        self.input_media_directory.setText(settings.get("media_directory", ""))
+        self.input_continuous_recording.setChecked(settings.get("continuous_recording", False))
+        self.input_segment_minutes.setValue(max(1, settings.get("segment_seconds", 300) // 60))
+        self.input_retention_days.setValue(int(settings.get("retention_days", 0)))
+        self.input_retention_gb.setValue(settings.get("retention_max_gb", 0.0))
+        self.input_motion_detection.setChecked(settings.get("motion_detection", False))
+        self.input_motion_threshold.setValue(settings.get("motion_threshold", 25))
+        self.input_motion_min_area.setValue(settings.get("motion_min_area", 0.01) * 100)
+        self.input_motion_post_roll.setValue(settings.get("motion_post_roll", 10.0))
+        self.input_preroll_seconds.setValue(settings.get("preroll_seconds", 0.0))
+        self.input_preroll_max_mb.setValue(settings.get("preroll_max_mb", 32.0))
+        self.input_snapshot_format.setCurrentIndex(
+            max(0, self.input_snapshot_format.findData(settings.get("snapshot_format", "jpg")))
+        )
+        self.input_snapshot_quality.setValue(settings.get("snapshot_quality", 90))
+        self.input_snapshot_max_width.setValue(settings.get("snapshot_max_width", 0))
+        self.input_burst_count.setValue(settings.get("burst_count", 5))
+        self.input_burst_interval.setValue(settings.get("burst_interval_ms", 200))
+        self.input_capture_all_mosaic.setChecked(settings.get("capture_all_mosaic", False))
+
+    def _build_media_tab(self):
+        media_tab = QWidget()
+        layout = QVBoxLayout(media_tab)
+        layout.setContentsMargins(8, 8, 8, 8)
+
+        info = QLabel("Visualiza, previsualiza y borra fotos/videos del directorio configurado.")
+        info.setWordWrap(True)
+
+        self.media_panel = MediaPanel("")
+
+        layout.addWidget(info)
+        layout.addWidget(self.media_panel, stretch=1)
+
+        self.tabs.addTab(media_tab, "Multimedia")
+
+    def _build_camera_list_tab(self):
+        list_tab = QWidget()
+        layout = QVBoxLayout(list_tab)
+        layout.setContentsMargins(8, 8, 8, 8)
+
+        info = QLabel("Listado consolidado de cámaras configuradas.")
+        info.setWordWrap(True)
+
+        self.camera_list_panel = CameraListPanel(on_edit=self.edit_camera_dialog, on_delete=self.delete_camera_with_confirmation)
+
+        layout.addWidget(info)
+        layout.addWidget(self.camera_list_panel, stretch=1)
+
+        self.tabs.addTab(list_tab, "Listado de cámaras")
+
+    def _refresh_header(self):
+        n = len(self.widgets)
+        self.counter_label.setText(f"{n} cámara" if n == 1 else f"{n} cámaras")
+
+    def build_grid(self):
+        while self.grid.count():
+            item = self.grid.takeAt(0)
+            if item.widget():
+                item.widget().setParent(None)
+
+        n = len(self.widgets)
+        self._refresh_header()
+        self.camera_list_panel.set_widgets(self.widgets)
+
+        if n == 0:
+            self.empty_label.show()
+            self.grid_host.hide()
+            return
+
+        self.empty_label.hide()
+        self.grid_host.show()
+
+        cols = math.ceil(math.sqrt(n))
+        rows = math.ceil(n / cols)
+
+        for i, widget in enumerate(self.widgets):
+            row, col = divmod(i, cols)
+            self.grid.addWidget(widget, row, col)
+
+        for row in range(rows):
+            self.grid.setRowStretch(row, 1)
+        for col in range(cols):
+            self.grid.setColumnStretch(col, 1)
+
+    def add_camera_dialog(self):
+        dialog = AddCameraDialog(self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        mac, usuario, password, tag = dialog.get_values()
+        if not mac or not usuario or not password:
+            QMessageBox.warning(self, "Datos incompletos", "Completa MAC, usuario y password.")
+            return
+
+        self.add_camera(mac, usuario, password, tag)
+
+    def edit_camera_dialog(self, widget):
+        feed = widget.feed
+        dialog = AddCameraDialog(
+            self,
+            title="Modificar cámara",
+            submit_text="Guardar cambios",
+            initial_values={
+                "mac": feed.mac,
+                "usuario": feed.usuario_raw,
+                "password": feed.password_raw,
+                "tag": feed.tag,
+            },
+        )
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        mac, usuario, password, tag = dialog.get_values()
+        if not mac or not usuario or not password:
+            QMessageBox.warning(self, "Datos incompletos", "Completa MAC, usuario y password.")
+            return
+
+        self.update_camera(widget, mac, usuario, password, tag)
+
+    def save_settings_from_tab(self):
+        tapo_settings = {
+            "tapo_user": self.input_tapo_user.text().strip(),
+            "tapo_password": self.input_tapo_password.text().strip(),
+            "ptz_repeat_ms": self.input_ptz_repeat.value(),
+        }
+        self.settings = update_settings(tapo_settings)
+
+        for widget in self.widgets:
+            widget.feed.set_settings(self.settings)
+
+        self.statusBar().showMessage("Configuración de Tapo guardada", 3000)
+
+    def select_media_directory(self):
+        selected = QFileDialog.getExistingDirectory(
+            self,
+            "Seleccionar carpeta de media",
+            self.input_media_directory.text().strip() or str(Path.home()),
+        )
+        if selected:
+            self.input_media_directory.setText(selected)
+
+    def save_media_directory_from_tab(self):
+        media_directory = self.input_media_directory.text().strip()
+        self.settings = update_settings({"media_directory": media_directory})
+        self._update_media_path_labels()
+        if self.media_window is not None:
+            self.media_window.set_directory(media_directory)
+        self.statusBar().showMessage("Ruta de media guardada", 3000)
+
+    def save_continuous_from_tab(self):
+        continuous_settings = {
+            "continuous_recording": self.input_continuous_recording.isChecked(),
+            "segment_seconds": self.input_segment_minutes.value() * 60,
+            "retention_days": float(self.input_retention_days.value()),
+            "retention_max_gb": self.input_retention_gb.value(),
+        }
+        self.settings = update_settings(continuous_settings)
+
+        for widget in self.widgets:
+            widget.feed.set_settings(self.settings)
+
+        self.statusBar().showMessage("Grabación continua guardada", 3000)
+
+    def save_motion_from_tab(self):
+        motion_settings = {
+            "motion_detection": self.input_motion_detection.isChecked(),
+            "motion_threshold": self.input_motion_threshold.value(),
+            "motion_min_area": self.input_motion_min_area.value() / 100,
+            "motion_post_roll": self.input_motion_post_roll.value(),
+        }
+        self.settings = update_settings(motion_settings)
+
+        for widget in self.widgets:
+            widget.feed.set_settings(self.settings)
+
+        self.statusBar().showMessage("Detección de movimiento guardada", 3000)
+
+    def save_preroll_from_tab(self):
+        preroll_settings = {
+            "preroll_seconds": self.input_preroll_seconds.value(),
+            "preroll_max_mb": self.input_preroll_max_mb.value(),
+        }
+        self.settings = update_settings(preroll_settings)
+
+        for widget in self.widgets:
+            widget.feed.set_settings(self.settings)
+
+        self.statusBar().showMessage("Pre-evento guardado", 3000)
+
+    def save_snapshot_from_tab(self):
+        snapshot_settings = {
+            "snapshot_format": self.input_snapshot_format.currentData(),
+            "snapshot_quality": self.input_snapshot_quality.value(),
+            "snapshot_max_width": self.input_snapshot_max_width.value(),
+            "burst_count": self.input_burst_count.value(),
+            "burst_interval_ms": self.input_burst_interval.value(),
+            "capture_all_mosaic": self.input_capture_all_mosaic.isChecked(),
+        }
+        self.settings = update_settings(snapshot_settings)
+
+        for widget in self.widgets:
+            widget.feed.set_settings(self.settings)
+
+        self.statusBar().showMessage("Ajustes de fotos guardados", 3000)
+
+    def _update_media_path_labels(self):
+        media_directory = self.settings.get("media_directory", "")
+        self.media_panel.set_directory(media_directory)
+
+    def open_media_window(self):
+        media_directory = self.settings.get("media_directory", "")
+        if self.media_window is None:
+            self.media_window = MediaPanel(media_directory)
+            self.media_window.setWindowTitle("Galería de media")
+            self.media_window.resize(800, 520)
+        else:
+            self.media_window.set_directory(media_directory)
+        self.media_window.show()
+        self.media_window.raise_()
+        self.media_window.activateWindow()
+
+    def capture_all_cameras(self):
+        if not self.widgets:
+            self.statusBar().showMessage("No hay cámaras para capturar", 3000)
+            return
+        self.btn_capture_all.setEnabled(False)
+        self.statusBar().showMessage("📸 Capturando todas las cámaras…")
+        capture_all(
+            [widget.feed for widget in self.widgets],
+            self.capture_all_done.emit,
+            mosaic=self.settings.get("capture_all_mosaic", False),
+        )
+
+    def _on_capture_all_done(self, result):
+        self.btn_capture_all.setEnabled(True)
+        tags = {widget.feed.mac: widget.feed.tag or widget.feed.mac for widget in self.widgets}
+        by_skew = sorted(result.skew_ms.items(), key=lambda item: item[1])
+        lines = [f"{tags.get(mac, mac)}: +{skew:.0f} ms" for mac, skew in by_skew]
+        lines += [f"{tags.get(mac, mac)}: ❌ {error}" for mac, error in result.errors.items()]
+        if result.mosaic_path is not None:
+            lines.append(f"Mosaico: {result.mosaic_path}")
+        self.btn_capture_all.setToolTip("Última captura conjunta (desfase entre frames):\n" + "\n".join(lines))
+
+        max_skew = max(result.skew_ms.values(), default=0.0)
+        message = f"📸 {len(result.paths)}/{len(tags)} fotos, desfase máx. {max_skew:.0f} ms"
+        self.statusBar().showMessage(message, 8000)
+
+    def add_camera(self, mac, usuario, password, tag=""):
+        feed = CameraFeed(mac, usuario, password, tag=tag, settings=self.settings)
+        feed.start()
+        widget = CameraWidget(feed)
+        self.widgets.append(widget)
+        self.build_grid()
+        save_cameras(self.widgets)
+        self.statusBar().showMessage(f"Cámara {mac} agregada", 3000)
+
+    def update_camera(self, widget, mac, usuario, password, tag=""):
+        if widget not in self.widgets:
+            return
+
+        index = self.widgets.index(widget)
+        previous_mac = widget.feed.mac
+        widget.feed.stop()
+        widget.dispose()
+        widget.deleteLater()
+
+        new_feed = CameraFeed(mac, usuario, password, tag=tag, settings=self.settings)
+        new_feed.start()
+        self.widgets[index] = CameraWidget(new_feed)
+
+        self.build_grid()
+        save_cameras(self.widgets)
+        self.statusBar().showMessage(f"Cámara {previous_mac} actualizada", 3000)
+
+    def delete_camera_with_confirmation(self, widget):
+        if widget not in self.widgets:
+            return
+
+        feed = widget.feed
+        confirm = QMessageBox.question(
+            self,
+            "Confirmar borrado",
+            f"¿Seguro que quieres borrar la cámara {feed.mac}?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+        widget.feed.stop()
+        widget.dispose()
+        self.widgets.remove(widget)
+        widget.deleteLater()
+
+        self.build_grid()
+        save_cameras(self.widgets)
+        self.statusBar().showMessage(f"Cámara {feed.mac} borrada", 3000)
+
+    def _preroll_stats_text(self, feed):
+        stats = feed.preroll_stats()
+        if not stats["frames"]:
+            return ""
+        return (
+            f"\nPre-evento: {stats['seconds']:.1f} s en {stats['bytes'] / 1024 ** 2:.1f} MB, "
+            f"{stats['skipped_frames']} frames sin comprimir a tiempo"
+        )
+
+    def _recording_stats_text(self, feed):
+        stats = feed.recording_stats()
+        if stats is None:
+            return ""
+        return (
+            f"\nGrabación: cola {stats['queue_depth']}, descartados {stats['dropped_frames']}, "
+            f"esperas {stats['blocked_puts']}, codificación {stats['encode_ms']:.1f} ms/frame"
+        )
+
+    def _motion_stats_text(self, feed):
+        stats = feed.motion_stats()
+        if stats is None:
+            return ""
+        state = "movimiento" if stats["active"] else "en reposo"
+        return f"\nMovimiento: {state}, {stats['events']} eventos, análisis {stats['analysis_ms']:.2f} ms/frame"
+
+    def _ptz_stats_text(self, feed):
+        stats = feed.ptz_stats()
+        if stats is None:
+            return ""
+        latency = f"{stats['latency_ms']:.0f} ms" if stats["latency_ms"] is not None else "-"
+        round_trip = f"{stats['round_trip_ms']:.0f} ms" if stats["round_trip_ms"] is not None else "-"
+        return (
+            f"\nPTZ: cola {stats['queue_depth']}, latencia {latency} (cámara {round_trip}), "
+            f"movimientos agrupados {stats['merged_moves']}, zooms descartados {stats['dropped_zooms']}"
+        )
+
+    def _refresh_render_stats(self):
+        rates = refresh_scheduler.report()
+        for widget in self.widgets:
+            capture = widget.feed.capture_stats()
+            latency = widget.renderer.latency_ms
+            latency_text = f"{latency:.0f} ms" if latency is not None else "-"
+            widget.status.setToolTip(
+                f"Refresco: {refresh_scheduler.rate_for(widget):.1f} fps\n"
+                f"Latencia captura→pantalla: {latency_text}\n"
+                f"Frames decodificados: {capture['decoded_frames']} | "
+                f"descartados sin decodificar: {capture['skipped_decodes']}"
+                + self._preroll_stats_text(widget.feed)
+                + self._recording_stats_text(widget.feed)
+                + self._motion_stats_text(widget.feed)
+                + self._ptz_stats_text(widget.feed)
+            )
+
+        stats = render_pipeline.report()
+        if not stats:
+            self.render_stats_label.setText("")
+            return
+        average = sum(stats.values()) / len(stats)
+        active = sum(1 for fps in rates.values() if fps > 0)
+        self.render_stats_label.setText(
+            f"Render GUI: {average:.2f} ms/tile (máx {max(stats.values()):.2f}) | "
+            f"{active}/{len(rates)} vistas activas, {sum(rates.values()):.1f} fps totales"
+        )
+
+    def timerEvent(self, event):
+        if event.timerId() == self.table_refresh_timer:
+            self.camera_list_panel.refresh_dynamic_values()
+            self._refresh_render_stats()
+        else:
+            super().timerEvent(event)
+
+    def closeEvent(self, event):
+        for widget in self.widgets:
+            widget.feed.stop()
+        super().closeEvent(event)
+
+
+def run():
+    # Los eventos de movimiento quedan registrados con fecha y hora junto al programa
+    logging.basicConfig(
+        filename=Path(__file__).with_name("eventos.log"),
+        level=logging.INFO,
+        format="%(asctime)s %(name)s %(message)s",
+    )
+    app = QApplication(sys.argv)
+    app.setStyleSheet(APP_STYLE)
+    win = MainWindow()
+    win.show()
+    return app.exec()